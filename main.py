@@ -1,11 +1,6 @@
 import argparse
 import subprocess
 
-from src.ingest import ingest_folder
-from src.preprocess import load_and_process
-from src.train import train
-from src.evaluate import evaluate
-
 
 def run_server():
     """Start the Flask UI."""
@@ -23,53 +18,134 @@ def main():
             "preprocess",
             "train",
             "evaluate",
+            "sweep",
+            "retrain",
             "predict",
+            "score",
             "serve",
         ],
         default="all",
     )
     parser.add_argument("--text", type=str, help="Text for prediction (predict mode)")
+    parser.add_argument("--input", type=str, help="CSV to categorize (score mode)")
+    parser.add_argument(
+        "--output", type=str, help="Output .csv or .parquet path (score mode)"
+    )
+    parser.add_argument(
+        "--text-column", type=str, help="Input text column (score mode, optional)"
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=3, help="Candidates per row (score mode)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Retrain mode: partial_fit the online model on new feedback only",
+    )
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Train mode: stream the data in chunks (hashing features + SGD)",
+    )
     parser.add_argument(
         "--run-server", action="store_true", help="Launch UI after pipeline"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for ingest (default 1) or serve (default from config)",
+    )
 
     args = parser.parse_args()
 
+    # Stage modules pull in sklearn/matplotlib; import them only when needed
+    # so that e.g. predict mode starts quickly.
     if args.mode == "ingest":
-        ingest_folder()
+        from src.ingest import ingest_folder
+
+        ingest_folder(workers=args.workers or 1)
         return
 
     if args.mode == "preprocess":
+        from src.preprocess import load_and_process
+
         load_and_process()
         return
 
     if args.mode == "train":
-        train()
+        if args.out_of_core:
+            from src.train import train_out_of_core
+
+            train_out_of_core()
+        else:
+            from src.train import train
+
+            train()
         if args.run_server:
             run_server()
         return
 
     if args.mode == "evaluate":
+        from src.evaluate import evaluate
+
         evaluate()
         return
 
+    if args.mode == "sweep":
+        from src.sweep import run_sweep
+
+        run_sweep()
+        return
+
+    if args.mode == "retrain":
+        from src.retrain_from_feedback import incremental_retrain, merge_and_retrain
+
+        if args.incremental:
+            incremental_retrain()
+        else:
+            merge_and_retrain()
+        return
+
     if args.mode == "predict":
         if not args.text:
             print('ERROR: use: python main.py --mode predict --text "Your text"')
             return
         from src.infer import predict
 
-        pred, conf = predict([args.text])[0]
-        print(f"Prediction: {pred} | Confidence: {conf:.3f}")
+        out = predict([args.text])[0]
+        print(f"Prediction: {out['pred']} | Confidence: {out['conf']:.3f}")
+        return
+
+    if args.mode == "score":
+        if not args.input or not args.output:
+            print(
+                "ERROR: use: python main.py --mode score --input in.csv --output out.csv"
+            )
+            return
+        from src.score import score_file
+
+        score_file(
+            args.input,
+            args.output,
+            text_column=args.text_column,
+            top_k=args.top_k,
+        )
         return
 
     if args.mode == "serve":
-        run_server()
+        from src.serve import serve
+
+        serve(workers=args.workers)
         return
 
     if args.mode == "all":
+        from src.ingest import ingest_folder
+        from src.preprocess import load_and_process
+        from src.train import train
+        from src.evaluate import evaluate
+
         print("=== INGEST ===")
-        ingest_folder()
+        ingest_folder(workers=args.workers or 1)
 
         print("=== PREPROCESS ===")
         load_and_process()
@@ -1,6 +1,11 @@
-import pandas as pd
+"""
+Report exact duplicate texts in the processed data.
+Run from the repo root: python -m scripts.check_duplicates
+"""
 
-df = pd.read_csv("data/processed/processed.csv")
+from src import storage
+
+df = storage.read_table("data/processed/processed", columns=["text"])
 print("Total rows:", len(df))
 dups = df.duplicated(subset=["text"], keep=False)
 print("Total duplicate rows (exact same text):", int(dups.sum()))
@@ -0,0 +1,72 @@
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+parser = argparse.ArgumentParser(description="Load test /api/v1/predict")
+parser.add_argument("--url", default="http://127.0.0.1:8787/api/v1/predict")
+parser.add_argument("--concurrency", type=int, default=16)
+parser.add_argument("--requests", type=int, default=500)
+parser.add_argument("--batch", type=int, default=1, help="Transactions per request")
+args = parser.parse_args()
+
+texts = (
+    pd.read_csv("data/raw/transaction_synthetic.csv")["transaction"]
+    .astype(str)
+    .tolist()
+)
+latencies = []
+errors = []
+lock = threading.Lock()
+counter = iter(range(args.requests))
+
+
+def worker():
+    rng = np.random.default_rng()
+    while True:
+        with lock:
+            if next(counter, None) is None:
+                return
+        body = json.dumps(
+            [texts[i] for i in rng.integers(0, len(texts), args.batch)]
+        ).encode("utf8")
+        req = urllib.request.Request(
+            args.url, data=body, headers={"Content-Type": "application/json"}
+        )
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as r:
+                r.read()
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+        except urllib.error.HTTPError as e:
+            with lock:
+                errors.append(e.code)
+        except urllib.error.URLError as e:
+            with lock:
+                errors.append(str(e.reason))
+
+
+t0 = time.perf_counter()
+threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+elapsed = time.perf_counter() - t0
+
+print(f"Requests: {len(latencies)} ok, {len(errors)} failed in {elapsed:.2f}s")
+print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s")
+if latencies:
+    lat = np.array(latencies) * 1000
+    print(
+        f"Latency ms: p50={np.percentile(lat, 50):.1f} "
+        f"p95={np.percentile(lat, 95):.1f} p99={np.percentile(lat, 99):.1f}"
+    )
+if errors:
+    print("Errors:", pd.Series(errors).value_counts().to_dict())
@@ -3,17 +3,117 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, request, render_template, redirect, url_for
-import csv
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    request,
+    render_template,
+    redirect,
+    stream_with_context,
+    url_for,
+)
+import json
+import threading
+import zlib
 
-from src.infer import predict
-from src.explain import explain_text
+from src import model_registry
+from src.batcher import MicroBatcher
+from src.config import get_section
+from src.infer import MODEL_PATH, cache_stats, predict
+from src.preprocess import normalize_cache_stats
+from src.explain import predict_and_explain
+from src.feedback_store import get_feedback_store
 from src.taxonomy_lookup import get_all_categories, alias_lookup, load_taxonomy
 
 app = Flask(__name__)
 
-FEEDBACK_FILE = "data/feedback/feedback.csv"
-os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
+API_MAX_BATCH = 100_000
+API_STREAM_THRESHOLD = 1_000
+
+# Per-process cap on in-flight requests; excess requests get a 503 instead of
+# queueing behind slow batches. Health checks are never limited. This is what
+# bounds the threaded Flask dev server (src/app.py). Under gunicorn (serve
+# mode) a gthread worker runs at most `threads` requests at once, so the 503
+# only fires if max_concurrency < threads; src.serve enforces the cap there
+# through gunicorn's worker_connections and backlog instead.
+MAX_CONCURRENCY = int(get_section("server").get("max_concurrency", 32))
+_in_flight = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_UNLIMITED_ENDPOINTS = {"healthz", "readyz", "metrics", "static"}
+
+
+_batching = get_section("batching")
+batcher = (
+    MicroBatcher(
+        predict_and_explain,
+        max_wait_ms=float(_batching.get("max_wait_ms", 5)),
+        max_batch=int(_batching.get("max_batch", 64)),
+    )
+    if _batching.get("enabled", True)
+    else None
+)
+BATCH_TIMEOUT = float(_batching.get("timeout_s", 10))
+
+
+def predict_one(text, top_k=5):
+    """
+    Prediction plus explanation for one text, coalesced with concurrent
+    requests if batching is enabled. Raises TimeoutError if the batched
+    result takes longer than batching.timeout_s.
+    """
+    if batcher is None:
+        return predict_and_explain([text], top_k=top_k)[0]
+    return batcher.predict(text, top_k=top_k, timeout=BATCH_TIMEOUT)
+
+
+def warmup():
+    """Load the model and taxonomy and run one prediction, so the first real
+    request does not pay for it (called before forking server workers)."""
+    model_registry.get(MODEL_PATH)
+    load_taxonomy()
+    predict(["warmup"], use_cache=False)
+
+
+@app.before_request
+def _acquire_slot():
+    if request.endpoint in _UNLIMITED_ENDPOINTS:
+        return None
+    if not _in_flight.acquire(blocking=False):
+        return jsonify({"error": "Server busy, retry later."}), 503
+    request.environ["app.slot"] = True
+    return None
+
+
+@app.teardown_request
+def _release_slot(exc=None):
+    if request.environ.pop("app.slot", False):
+        _in_flight.release()
+
+
+@app.route("/healthz")
+def healthz():
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz")
+def readyz():
+    """Ready once the model is loaded in this process."""
+    loaded = model_registry.peek(MODEL_PATH)
+    if loaded is None:
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True, "model_version": loaded.version})
+
+
+@app.route("/metrics")
+def metrics():
+    """Batching, prediction-cache and normalization counters for this process."""
+    return jsonify(
+        {
+            "batcher": batcher.stats() if batcher is not None else None,
+            "prediction_cache": cache_stats(),
+            "normalize_cache": normalize_cache_stats(),
+        }
+    )
 
 
 def get_categories():
@@ -57,34 +157,20 @@ def index():
                 low = label_to_write.lower()
                 if low in display_to_id:
                     label_to_write = display_to_id[low]
-            with open(FEEDBACK_FILE, "a", newline="", encoding="utf8") as f:
-                writer = csv.writer(f)
-                writer.writerow([text, label_to_write])
+            get_feedback_store().append(text, label_to_write)
             return redirect(url_for("index"))
         if not text:
             return redirect(url_for("index"))
 
-        out = predict([text], top_k=5)[0]
+        try:
+            out = predict_one(text, top_k=5)
+        except Exception:
+            out = predict([text], top_k=5)[0]
         pred = out.get("pred")
         conf = out.get("conf", 0.0)
         candidates = out.get("candidates", [])
         alias_override = out.get("alias_override")
-        expl = []
-        try:
-            maybe = explain_text(text)
-            if isinstance(maybe, list):
-                expl = maybe
-            elif (
-                isinstance(maybe, tuple)
-                and len(maybe) >= 3
-                and isinstance(maybe[2], list)
-            ):
-                expl = maybe[2]
-            else:
-                if hasattr(maybe, "__iter__"):
-                    expl = list(maybe)
-        except Exception:
-            expl = []
+        expl = out.get("explanation", [])
         norm_expl = []
         for item in expl or []:
             try:
@@ -114,5 +200,77 @@ def index():
     )
 
 
+def _api_texts(payload):
+    """
+    Extract transaction texts from an API payload: a JSON array of strings or
+    of objects with a "transaction" (or "text") field, optionally wrapped as
+    {"transactions": [...]}.
+    """
+    if isinstance(payload, dict):
+        payload = payload.get("transactions")
+    if not isinstance(payload, list):
+        raise ValueError("Body must be a JSON array of transactions.")
+    texts = []
+    for item in payload:
+        if isinstance(item, dict):
+            item = item.get("transaction", item.get("text"))
+        if not isinstance(item, str):
+            raise ValueError(
+                "Each transaction must be a string or an object with a "
+                "'transaction' field."
+            )
+        texts.append(item)
+    return texts
+
+
+def _gzip_ndjson(results):
+    gz = zlib.compressobj(wbits=31)
+    buf = []
+    for r in results:
+        buf.append(json.dumps(r) + "\n")
+        if len(buf) >= 500:
+            yield gz.compress("".join(buf).encode("utf8"))
+            buf = []
+    yield gz.compress("".join(buf).encode("utf8")) + gz.flush()
+
+
+@app.route("/api/v1/predict", methods=["POST"])
+def api_predict():
+    """
+    Batch prediction endpoint. Returns one {pred, conf, candidates,
+    alias_override} object per input transaction, in input order, from a
+    single vectorized predict() call (?explain=1 adds per-feature
+    "explanation" pairs from the same pass). Large batches (or clients asking for
+    application/x-ndjson) get a gzip-compressed JSON-lines stream.
+    """
+    try:
+        texts = _api_texts(request.get_json(silent=True))
+        top_k = int(request.args.get("top_k", 5))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len(texts) > API_MAX_BATCH:
+        return (
+            jsonify({"error": f"At most {API_MAX_BATCH} transactions per call."}),
+            413,
+        )
+
+    if request.args.get("explain") in ("1", "true"):
+        results = predict_and_explain(texts, top_k=top_k)
+    else:
+        results = predict(texts, top_k=top_k)
+
+    wants_ndjson = "application/x-ndjson" in request.headers.get("Accept", "")
+    if not (wants_ndjson or len(results) > API_STREAM_THRESHOLD):
+        return jsonify(results)
+    if "gzip" not in request.headers.get("Accept-Encoding", ""):
+        lines = (json.dumps(r) + "\n" for r in results)
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+    return Response(
+        stream_with_context(_gzip_ndjson(results)),
+        mimetype="application/x-ndjson",
+        headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+    )
+
+
 if __name__ == "__main__":
     app.run(port=8787, debug=True)
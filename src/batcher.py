@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text predictions into batched calls.
+
+    Callers submit one text and get a Future. A background thread takes the
+    first queued request, keeps collecting until `max_batch` items are queued
+    or `max_wait_ms` have passed since that first request arrived, scores the
+    batch with one `predict_fn(texts, top_k=...)` call per distinct top_k and
+    resolves every Future. If nothing else is queued behind the first request
+    it is dispatched at once, so a lone request pays no wait. The thread
+    starts on first use, so it is created inside each server worker after
+    forking.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[..., List[Dict[str, Any]]],
+        max_wait_ms: float = 5.0,
+        max_batch: int = 64,
+    ):
+        self.predict_fn = predict_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batch_sizes: Counter = Counter()
+        self._queue_waits = deque(maxlen=10000)
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="micro-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, text: str, top_k: int = 5) -> Future:
+        self._ensure_started()
+        fut: Future = Future()
+        self._queue.put((text, top_k, time.perf_counter(), fut))
+        return fut
+
+    def predict(self, text: str, top_k: int = 5, timeout=None) -> Dict[str, Any]:
+        """
+        Blocking convenience wrapper: one result dict for one text. Raises
+        concurrent.futures.TimeoutError if no result arrives within `timeout`
+        seconds; the request is then cancelled so the batch thread skips it.
+        """
+        fut = self.submit(text, top_k=top_k)
+        try:
+            return fut.result(timeout=timeout)
+        except TimeoutError:
+            fut.cancel()
+            raise
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            if self._queue.empty():
+                # nobody else is waiting: dispatch now instead of idling
+                deadline = 0.0
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._process(batch)
+            except BaseException as e:
+                # never let the thread die and leave callers waiting forever
+                for item in batch:
+                    if not item[3].done():
+                        item[3].set_exception(e)
+
+    def _process(self, batch) -> None:
+        started = time.perf_counter()
+        # drops requests whose caller timed out and cancelled them
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        with self._stats_lock:
+            self.batch_sizes[len(batch)] += 1
+            self._queue_waits.extend(started - item[2] for item in batch)
+
+        by_k: Dict[int, list] = {}
+        for item in batch:
+            by_k.setdefault(item[1], []).append(item)
+        for top_k, items in by_k.items():
+            try:
+                results = self.predict_fn([it[0] for it in items], top_k=top_k)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"predict_fn returned {len(results)} results "
+                        f"for {len(items)} texts"
+                    )
+            except Exception as e:
+                for it in items:
+                    it[3].set_exception(e)
+                continue
+            for it, res in zip(items, results):
+                it[3].set_result(res)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            sizes = dict(sorted(self.batch_sizes.items()))
+            waits = np.array(self._queue_waits) * 1000.0
+        batches = sum(sizes.values())
+        items = sum(k * v for k, v in sizes.items())
+        out = {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+            "batch_size_histogram": sizes,
+            "queue_depth": self._queue.qsize(),
+        }
+        if waits.size:
+            out["queue_wait_ms"] = {
+                "p50": float(np.percentile(waits, 50)),
+                "p95": float(np.percentile(waits, 95)),
+                "max": float(waits.max()),
+            }
+        return out
@@ -1,13 +1,48 @@
 import time
-from src.infer import predict
+import pandas as pd
+from src import preprocess
+from src.infer import predict, cache_stats
+from src.preprocess import normalize_cache_stats
 
-texts = ["Starbucks 123"] * 1000
-t0 = time.time()
+N_SINGLE = 1000
+N_BATCH = 20000
+
+pool = pd.read_csv("data/raw/transaction_synthetic.csv")["transaction"].astype(str)
+texts = pool.sample(N_SINGLE, replace=True, random_state=42).tolist()
+# every text once: measures vectorized scoring alone
+distinct_texts = pool.drop_duplicates().sample(frac=1, random_state=7).tolist()
+# sampled with replacement, like a bank feed: predict() scores each distinct
+# text once, so this also measures deduplication
+repeated_texts = pool.sample(N_BATCH, replace=True, random_state=7).tolist()
+
+
+def _timed(batch):
+    """Per-row seconds for one uncached predict() call on a cold normalize memo."""
+    preprocess._normalize_str.cache_clear()
+    t0 = time.perf_counter()
+    predict(batch, use_cache=False)
+    return (time.perf_counter() - t0) / len(batch)
+
+
+predict(texts[:10], use_cache=False)
+preprocess._normalize_str.cache_clear()
+t0 = time.perf_counter()
 for x in texts:
-    predict([x])
-t1 = time.time()
-print("Single-call avg (s):", (t1 - t0) / len(texts))
-t0 = time.time()
-predict(texts)
-t1 = time.time()
-print("Batch avg (s):", (t1 - t0) / len(texts))
+    predict([x], use_cache=False)
+t1 = time.perf_counter()
+single = (t1 - t0) / len(texts)
+print("Single-call avg (s):", single)
+for name, batch_texts in (("distinct", distinct_texts), ("repeated", repeated_texts)):
+    batch = _timed(batch_texts)
+    print(
+        f"Batch of {len(batch_texts)} {name} texts: {batch:.7f} s/row, "
+        f"{1 / batch:,.0f} rows/s ({single / batch:.1f}x single-call)"
+    )
+
+predict(repeated_texts)
+t0 = time.perf_counter()
+predict(repeated_texts)
+t1 = time.perf_counter()
+cached = (t1 - t0) / len(repeated_texts)
+print(f"Cached batch throughput: {1 / cached:,.0f} rows/s", cache_stats())
+print("normalize_text memo:", normalize_cache_stats())
@@ -0,0 +1,26 @@
+import time
+from src import storage
+from src.preprocess import normalize_text, normalize_series
+
+N = 1_000_000
+
+raw = (
+    storage.read_table("data/raw/canonical_transactions", columns=["transaction"])[
+        "transaction"
+    ]
+    .sample(N, replace=True, random_state=42)
+    .reset_index(drop=True)
+)
+
+t0 = time.perf_counter()
+expected = raw.apply(normalize_text)
+t1 = time.perf_counter()
+got = normalize_series(raw)
+t2 = time.perf_counter()
+
+same = expected.astype(object).equals(got)
+assert same, "normalize_series output differs from normalize_text"
+print(f"Rows: {N:,} ({raw.nunique():,} distinct)")
+print("Series.apply(normalize_text) (s):", t1 - t0)
+print("normalize_series (s):", t2 - t1)
+print(f"Speedup: {(t1 - t0) / (t2 - t1):.1f}x")
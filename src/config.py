@@ -0,0 +1,21 @@
+import yaml
+from functools import lru_cache
+
+CONFIG_PATH = "configs/config.yaml"
+
+
+@lru_cache()
+def load_config(path=CONFIG_PATH):
+    """
+    Returns the pipeline config as a dict ({} if the file is empty or missing).
+    """
+    try:
+        with open(path, "r", encoding="utf8") as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def get_section(name, path=CONFIG_PATH):
+    """Return one top-level section of the config ({} if absent)."""
+    return load_config(path).get(name) or {}
@@ -1,24 +1,50 @@
-import pandas as pd
-from sklearn.pipeline import make_pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
+from joblib import Parallel, delayed
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import cross_val_score, StratifiedKFold
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold
 import numpy as np
 
-df = pd.read_csv("data/processed/processed.csv")
-if "text" not in df.columns:
-    df = (
-        df.rename(columns={"transaction": "text"})
-        if "transaction" in df.columns
-        else df
+from src import feature_store, storage
+from src.features import build_vectorizer
+
+
+def _fold_score(X_train, y_train, X_test, y_test):
+    vec, Xv_train = feature_store.fit_transform(
+        build_vectorizer(),
+        X_train,
     )
-X = df["text"]
-y = df["label"]
-pipe = make_pipeline(
-    TfidfVectorizer(ngram_range=(1, 2), analyzer="char_wb", max_features=5000),
-    LogisticRegression(max_iter=1000, class_weight="balanced", random_state=42),
-)
-cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-scores = cross_val_score(pipe, X, y, cv=cv, scoring="f1_macro", n_jobs=-1)
-print("5-fold macro F1 scores:", scores)
-print("Mean:", np.mean(scores), "Std:", np.std(scores))
+    clf = LogisticRegression(max_iter=1000, class_weight="balanced", random_state=42)
+    clf.fit(Xv_train, y_train)
+    y_pred = clf.predict(feature_store.transform(vec, X_test))
+    return f1_score(y_test, y_pred, average="macro")
+
+
+def run_crossval(processed_csv="data/processed/processed", n_splits=5):
+    """
+    Stratified k-fold macro F1. Each fold's TF-IDF features come from the
+    feature store, so repeated runs on the same data skip tokenization.
+    """
+    df = storage.read_table(processed_csv)
+    if "text" not in df.columns:
+        df = (
+            df.rename(columns={"transaction": "text"})
+            if "transaction" in df.columns
+            else df
+        )
+    X = df["text"].fillna("").astype(str)
+    y = df["label"]
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+    scores = Parallel(n_jobs=-1)(
+        delayed(_fold_score)(
+            X.iloc[tr].tolist(), y.iloc[tr], X.iloc[te].tolist(), y.iloc[te]
+        )
+        for tr, te in cv.split(X, y)
+    )
+    scores = np.array(scores)
+    print(f"{n_splits}-fold macro F1 scores:", scores)
+    print("Mean:", np.mean(scores), "Std:", np.std(scores))
+    return scores
+
+
+if __name__ == "__main__":
+    run_crossval()
@@ -1,19 +1,100 @@
 import joblib, pandas as pd, numpy as np
-from sklearn.metrics import classification_report, confusion_matrix
 import matplotlib.pyplot as plt, seaborn as sns
 import os
-from src.preprocess import load_and_process
+from src import feature_store, storage
+from src.train import HOLDOUT_CHUNKSIZE, holdout_path, split_dataset
 
+PROCESSED_FILE = "data/processed/processed"
 
-def evaluate(model_path="artifacts/checkpoints/baseline.joblib"):
-    df = load_and_process()
+
+def _holdout_chunks(model_path, chunksize):
+    """
+    Yield (texts, labels) chunks of the held-out split persisted by train().
+    Models trained before the split was persisted fall back to recomputing
+    the same deterministic split from the processed data.
+    """
+    path = holdout_path(model_path)
+    if storage.exists(path):
+        for chunk in storage.iter_batches(
+            path, ["text", "label"], batch_size=chunksize
+        ):
+            yield chunk["text"].fillna(""), chunk["label"]
+        return
+    print(f"No held-out split at {path}; recomputing it from {PROCESSED_FILE}")
+    _, X_test, _, y_test = split_dataset(
+        storage.read_table(PROCESSED_FILE, columns=["text", "label"])
+    )
+    for i in range(0, len(X_test), chunksize):
+        yield X_test.iloc[i : i + chunksize], y_test.iloc[i : i + chunksize]
+
+
+def _report_from_confusion(cm, labels):
+    """
+    classification_report-style text computed from a confusion matrix. As
+    there, only labels that occur in y_true or y_pred are reported and
+    averaged, in sorted order.
+    """
+    present = cm.sum(axis=0) + cm.sum(axis=1) > 0
+    order = sorted(np.flatnonzero(present), key=lambda i: labels[i])
+    cm = cm[np.ix_(order, order)]
+    labels = [labels[i] for i in order]
+    tp = np.diag(cm).astype(float)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros_like(tp), where=support > 0)
+    denom = precision + recall
+    f1 = np.divide(
+        2 * precision * recall, denom, out=np.zeros_like(tp), where=denom > 0
+    )
+    total = support.sum()
+    width = max(len(str(l)) for l in list(labels) + ["weighted avg"])
+    lines = [
+        f"{'':>{width}} {'precision':>9} {'recall':>9} {'f1-score':>9} {'support':>9}",
+        "",
+    ]
+    for l, p, r, f, s in zip(labels, precision, recall, f1, support):
+        lines.append(f"{str(l):>{width}} {p:9.4f} {r:9.4f} {f:9.4f} {s:9d}")
+    lines.append("")
+    lines.append(
+        f"{'accuracy':>{width}} {'':>9} {'':>9} {tp.sum() / total:9.4f} {total:9d}"
+    )
+    lines.append(
+        f"{'macro avg':>{width}} {precision.mean():9.4f} {recall.mean():9.4f} "
+        f"{f1.mean():9.4f} {total:9d}"
+    )
+    w = support / total
+    lines.append(
+        f"{'weighted avg':>{width}} {precision @ w:9.4f} {recall @ w:9.4f} "
+        f"{f1 @ w:9.4f} {total:9d}"
+    )
+    return "\n".join(lines)
+
+
+def evaluate(
+    model_path="artifacts/checkpoints/baseline.joblib", chunksize=HOLDOUT_CHUNKSIZE
+):
+    """
+    Score the model's held-out split chunk by chunk, accumulating a
+    confusion matrix so memory stays bounded by `chunksize`.
+    """
     model = joblib.load(model_path)
-    X = df["text"]
-    y = df["label"]
-    y_pred = model.predict(X)
-    print(classification_report(y, y_pred, digits=4))
-    labels = model.classes_
-    cm = confusion_matrix(y, y_pred, labels=labels)
+    vec, clf = model.steps[0][1], model.steps[-1][1]
+    labels = [str(c) for c in model.classes_]
+    index = {l: i for i, l in enumerate(labels)}
+    cm = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    for texts, y in _holdout_chunks(model_path, chunksize):
+        y_pred = clf.predict(feature_store.transform(vec, texts.fillna("")))
+        for l in pd.unique(y.astype(str)):
+            if l not in index:
+                # labels the model never saw still count against recall
+                index[l] = len(labels)
+                labels.append(l)
+                cm = np.pad(cm, ((0, 1), (0, 1)))
+        true_idx = np.fromiter((index[l] for l in y.astype(str)), dtype=np.int64)
+        pred_idx = np.fromiter((index[str(l)] for l in y_pred), dtype=np.int64)
+        np.add.at(cm, (true_idx, pred_idx), 1)
+    print(_report_from_confusion(cm, labels))
     os.makedirs("artifacts/metrics", exist_ok=True)
     sns.heatmap(cm, annot=True, fmt="d", xticklabels=labels, yticklabels=labels)
     plt.xlabel("Predicted")
@@ -21,6 +102,7 @@ def evaluate(model_path="artifacts/checkpoints/baseline.joblib"):
     plt.title("Confusion matrix")
     plt.savefig("artifacts/metrics/confusion_matrix.png")
     print("Saved confusion matrix to artifacts/metrics/confusion_matrix.png")
+    return cm, labels
 
 
 if __name__ == "__main__":
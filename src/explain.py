@@ -1,33 +1,85 @@
-import joblib
-import os
 import numpy as np
+
+from src import model_registry
+from src.infer import _softmax, _top_k_indices, murmurhash3_32, predict
 from src.preprocess import normalize_text
+from src.taxonomy_lookup import alias_lookup_many
+
+MODEL_PATH = model_registry.DEFAULT_PATH
+
+
+def _fallback_features(txt):
+    words = txt.split()
+    return [
+        ("length", float(len(txt))),
+        ("word_count", float(len(words))),
+    ]
+
 
-MODEL_PATH = os.path.join("artifacts", "checkpoints", "baseline.joblib")
-_model = None
-_vectorizer = None
-_clf = None
-
-
-def _load():
-    global _model, _vectorizer, _clf
-    if _model is None:
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(f"Model not found at {MODEL_PATH}")
-        _model = joblib.load(MODEL_PATH)
-        try:
-            _vectorizer = _model.named_steps.get(
-                "tfidfvectorizer"
-            ) or _model.named_steps.get("tfidfvectorizer")
-            _clf = (
-                _model.named_steps.get("logisticregression")
-                or _model.named_steps.get("svc")
-                or _model.named_steps.get("linearSVC")
-                or _model.named_steps.get("classifier")
-            )
-        except Exception:
-            _vectorizer = None
-            _clf = None
+def explain_many(texts, top_n=8):
+    """
+    Batch explain_text: one list of (feature, score) per text.
+
+    All texts are vectorized and scored in one call; contributions are then
+    computed only over the non-zero entries of each sparse TF-IDF row, so the
+    cost per text is proportional to its n-grams, not to the vocabulary.
+    """
+    loaded = model_registry.get(MODEL_PATH)
+    _vectorizer, _clf = loaded.vectorizer, loaded.classifier
+    txts = [normalize_text(t) for t in texts]
+    if _vectorizer is None or not hasattr(_clf, "coef_"):
+        return [_fallback_features(t) for t in txts]
+
+    Xv = _vectorizer.transform(txts).tocsr()
+    class_idx = np.argmax(_probabilities(_clf, Xv), axis=1)
+    return _sparse_contributions(Xv, _clf.coef_, class_idx, loaded, txts, top_n)
+
+
+def _probabilities(clf, Xv):
+    """
+    predict_proba, or a softmax over decision_function for classifiers
+    without it; binary scores of shape (n,) are stacked as [-d, d] first.
+    """
+    if hasattr(clf, "predict_proba"):
+        return clf.predict_proba(Xv)
+    scores = np.asarray(clf.decision_function(Xv))
+    if scores.ndim == 1:
+        scores = np.column_stack([-scores, scores])
+    return _softmax(scores)
+
+
+def _hashed_feature_names(vectorizer, txt):
+    """Map hashed column -> n-gram for one text (hashing vectorizers only)."""
+    grams = list(dict.fromkeys(vectorizer.build_analyzer()(txt)))
+    if not grams:
+        return {}
+    cols = np.abs(murmurhash3_32([g.encode("utf8") for g in grams]))
+    return dict(zip((cols % vectorizer.n_features).tolist(), grams))
+
+
+def _sparse_contributions(Xv, coef, class_idx, loaded, txts, top_n):
+    """Top-n (feature, coef * tfidf) pairs per CSR row for its class_idx."""
+    feat_names = loaded.feature_names
+    if coef.shape[0] == 1:
+        # binary models keep one weight row, for classes_[1]; classes_[0]
+        # takes its negation
+        coef_row = np.zeros_like(class_idx)
+        sign = np.where(class_idx == 1, 1.0, -1.0)
+    else:
+        coef_row, sign = class_idx, np.ones(len(class_idx))
+    res = []
+    for row in range(Xv.shape[0]):
+        start, end = Xv.indptr[row], Xv.indptr[row + 1]
+        cols = Xv.indices[start:end]
+        contribs = sign[row] * coef[coef_row[row], cols] * Xv.data[start:end]
+        order = np.argsort(-np.abs(contribs), kind="stable")[:top_n]
+        if feat_names is not None:
+            names = [feat_names[cols[i]] for i in order]
+        else:
+            hashed = _hashed_feature_names(loaded.vectorizer, txts[row])
+            names = [hashed.get(cols[i], f"#{cols[i]}") for i in order]
+        res.append([(n, float(contribs[i])) for n, i in zip(names, order)])
+    return res
 
 
 def explain_text(text, top_n=8):
@@ -35,28 +87,60 @@ def explain_text(text, top_n=8):
     Returns list of (feature, score) sorted desc by absolute contribution.
     If SHAP explainer is not available we use linear coefficient approximation.
     """
-    _load()
-    txt = normalize_text(text)
-    if _vectorizer is not None and hasattr(_clf, "coef_"):
-        Xv = _vectorizer.transform([txt])
-        arr = Xv.toarray()[0]
-        if hasattr(_clf, "predict_proba"):
-            probs = _clf.predict_proba(Xv)[0]
-            class_idx = int(np.argmax(probs))
+    return explain_many([text], top_n=top_n)[0]
+
+
+def predict_and_explain(texts, top_k=5, top_n=8):
+    """
+    predict() and explain_many() in one pass.
+
+    Each text is normalized, vectorized and scored once; the same sparse row
+    and probabilities give the prediction, top-k candidates and per-feature
+    contributions. Returns predict()-style result dicts with an extra
+    "explanation" list of (feature, score). Token alias hits still override
+    the prediction, exactly as in predict().
+    """
+    loaded = model_registry.get(MODEL_PATH)
+    _vectorizer, _clf = loaded.vectorizer, loaded.classifier
+    if _vectorizer is None or not hasattr(_clf, "coef_"):
+        results = predict(texts, top_k=top_k)
+        for r, expl in zip(results, explain_many(texts, top_n=top_n)):
+            r["explanation"] = expl
+        return results
+
+    try:
+        alias_hits = alias_lookup_many(texts)
+    except Exception:
+        alias_hits = [(None, None, None)] * len(texts)
+    txts = [normalize_text(t) for t in texts]
+    Xv = _vectorizer.transform(txts).tocsr()
+    probs = _probabilities(_clf, Xv)
+    class_idx = np.argmax(probs, axis=1)
+    explanations = _sparse_contributions(Xv, _clf.coef_, class_idx, loaded, txts, top_n)
+    class_ids = [str(c) for c in _clf.classes_]
+    top_idx = _top_k_indices(probs, top_k)
+    top_probs = np.take_along_axis(probs, top_idx, axis=1)
+
+    results = []
+    for row, (alias_cat, method, _) in enumerate(alias_hits):
+        if alias_cat and method == "token":
+            out = {
+                "pred": alias_cat,
+                "conf": 0.99,
+                "candidates": [{"id": alias_cat, "prob": 0.99}],
+                "alias_override": True,
+            }
         else:
-            class_idx = 0
-        contribs = _clf.coef_[class_idx] * arr
-        feat_names = _vectorizer.get_feature_names_out()
-        idxs = np.argsort(-np.abs(contribs))[:top_n]
-        res = []
-        for i in idxs:
-            if arr[i] == 0 and abs(contribs[i]) < 1e-9:
-                continue
-            res.append((feat_names[i], float(contribs[i])))
-        return res
-    words = txt.split()
-    feats = [
-        ("length", float(len(txt))),
-        ("word_count", float(len(words))),
-    ]
-    return feats
+            candidates = [
+                {"id": class_ids[c], "prob": float(p)}
+                for c, p in zip(top_idx[row], top_probs[row])
+            ]
+            out = {
+                "pred": candidates[0]["id"],
+                "conf": candidates[0]["prob"],
+                "candidates": candidates,
+                "alias_override": False,
+            }
+        out["explanation"] = explanations[row]
+        results.append(out)
+    return results
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+FORMAT_VERSION = 3
+SUPPORTED_ANALYZERS = ("char_wb", "char", "word")
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+def export_path(model_path):
+    """Directory holding the NumPy export of the checkpoint at `model_path`."""
+    return os.path.splitext(model_path)[0] + ".npmodel"
+
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _vectorizer_meta(vec):
+    hashing = not hasattr(vec, "vocabulary_")
+    if not hasattr(vec, "use_idf") or (hashing and not hasattr(vec, "idf_")):
+        raise ValueError(
+            "Only fitted TfidfVectorizer/HashingTfidfVectorizer pipelines can be "
+            f"exported, got {type(vec).__name__}"
+        )
+    analyzer = vec.analyzer
+    if analyzer not in SUPPORTED_ANALYZERS:
+        raise ValueError(f"Unsupported analyzer {analyzer!r}")
+    if getattr(vec, "preprocessor", None) or getattr(vec, "tokenizer", None):
+        raise ValueError("Custom preprocessors and tokenizers cannot be exported")
+    if getattr(vec, "stop_words", None) is not None:
+        raise ValueError("Vectorizers with stop_words cannot be exported")
+    strip_accents = getattr(vec, "strip_accents", None)
+    if strip_accents not in (None, "ascii", "unicode"):
+        raise ValueError(f"Unsupported strip_accents {strip_accents!r}")
+    if getattr(vec, "input", "content") != "content":
+        raise ValueError(f"Unsupported input {vec.input!r}")
+    return {
+        "hashing": hashing,
+        "analyzer": analyzer,
+        "ngram_range": list(vec.ngram_range),
+        "lowercase": bool(vec.lowercase),
+        "strip_accents": strip_accents,
+        "token_pattern": getattr(vec, "token_pattern", None) or DEFAULT_TOKEN_PATTERN,
+        "binary": bool(vec.binary),
+        "sublinear_tf": bool(vec.sublinear_tf),
+        "use_idf": bool(vec.use_idf),
+        "norm": vec.norm,
+    }
+
+
+def _proba_mode(clf):
+    """
+    How the classifier turns decision scores into predict_proba:
+    "softmax" (multinomial LogisticRegression) or "ovr" (a sigmoid per
+    class, normalized to sum to one, as SGDClassifier(log_loss) and
+    one-vs-rest LogisticRegression do). Binary models are a sigmoid either way.
+    """
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+    if isinstance(clf, SGDClassifier):
+        if clf.loss != "log_loss":
+            raise ValueError("Only log-loss SGDClassifiers can be exported")
+        return "ovr"
+    if isinstance(clf, LogisticRegression):
+        multi_class = getattr(clf, "multi_class", "auto")
+        if multi_class == "ovr" or (
+            multi_class != "multinomial" and clf.solver == "liblinear"
+        ):
+            return "ovr"
+        return "softmax"
+    raise ValueError(
+        "Only LogisticRegression and SGDClassifier(log_loss) can be exported, "
+        f"got {type(clf).__name__}"
+    )
+
+
+def export_model(pipe, model_path, out_dir=None):
+    """
+    Write the TF-IDF vocabulary and IDF weights and the linear classifier's
+    coef/intercept of `pipe` (saved at `model_path`) as raw .npy arrays plus
+    a meta.json, so src.infer.NumpyModel can memory-map them and score
+    without scikit-learn. Returns the export directory.
+    """
+    out_dir = out_dir or export_path(model_path)
+    steps = getattr(pipe, "steps", None) or []
+    if len(steps) != 2:
+        raise ValueError("Expected a (vectorizer, classifier) pipeline")
+    vec, clf = steps[0][1], steps[1][1]
+    meta = _vectorizer_meta(vec)
+    proba = _proba_mode(clf)
+
+    arrays = {}
+    if meta["hashing"]:
+        n_features = int(vec.n_features)
+    else:
+        # Vocabulary as UTF-8 terms sorted for np.searchsorted, with the column
+        # of each term and, for explanations, the sorted position of each column.
+        items = sorted((t.encode("utf8"), col) for t, col in vec.vocabulary_.items())
+        term_cols = np.array([col for _, col in items], dtype=np.int64)
+        col_terms = np.empty_like(term_cols)
+        col_terms[term_cols] = np.arange(len(term_cols))
+        arrays = {
+            "terms": np.array([t for t, _ in items], dtype=bytes),
+            "term_cols": term_cols,
+            "col_terms": col_terms,
+        }
+        n_features = len(term_cols)
+    meta.update(
+        {
+            "format_version": FORMAT_VERSION,
+            "classes": [str(c) for c in clf.classes_],
+            "n_features": n_features,
+            "proba": proba,
+            "source_sha1": _file_digest(model_path),
+        }
+    )
+
+    tmp = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), arr)
+    idf = vec.idf_ if vec.use_idf else np.ones(n_features)
+    np.save(os.path.join(tmp, "idf.npy"), np.asarray(idf, dtype=np.float64))
+    # (n_features, n_classes) so a row gather gives one feature's weights
+    np.save(
+        os.path.join(tmp, "coef.npy"),
+        np.ascontiguousarray(np.asarray(clf.coef_, dtype=np.float64).T),
+    )
+    np.save(
+        os.path.join(tmp, "intercept.npy"),
+        np.asarray(clf.intercept_, dtype=np.float64),
+    )
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf8") as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    return out_dir
+
+
+def save_model(pipe, model_path):
+    """
+    joblib.dump `pipe` to `model_path` together with its NumPy export.
+    The export is written first, from a temporary checkpoint with the same
+    content, and the checkpoint is then swapped in with os.replace: a
+    process that sees the new checkpoint always finds its export fresh, so
+    a lean registry reload serves the memory-mapped export rather than
+    falling back to unpickling. Returns the export directory.
+    """
+    import joblib
+
+    tmp = f"{model_path}.tmp-{os.getpid()}"
+    joblib.dump(pipe, tmp)
+    try:
+        out_dir = export_model(pipe, tmp, out_dir=export_path(model_path))
+        os.replace(tmp, model_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return out_dir
+
+
+def fresh_export(model_path):
+    """
+    The export directory for `model_path` if it was written from the
+    checkpoint currently on disk (compared by content, so a checked-out
+    export stays valid), else None.
+    """
+    out_dir = export_path(model_path)
+    try:
+        with open(os.path.join(out_dir, "meta.json"), "r", encoding="utf8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format_version") != FORMAT_VERSION:
+        return None
+    try:
+        if meta.get("source_sha1") != _file_digest(model_path):
+            return None
+    except OSError:
+        return None
+    return out_dir
+
+
+if __name__ == "__main__":
+    import joblib
+
+    from src.model_registry import DEFAULT_PATH
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    print("Exported", path, "to", export_model(joblib.load(path), path))
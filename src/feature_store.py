@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+
+from src.config import get_section
+
+FEATURE_DIR = get_section("feature_store").get("dir", "artifacts/features")
+
+
+def texts_digest(texts):
+    """Content hash of a sequence of texts (order-sensitive)."""
+    h = hashlib.sha1()
+    for t in texts:
+        h.update(str(t).encode("utf8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _params_json(vectorizer):
+    return json.dumps(vectorizer.get_params(), sort_keys=True, default=repr)
+
+
+def fitted_key(vectorizer):
+    """
+    Fingerprint of a fitted vectorizer: its params plus its learned state
+    (vocabulary and idf weights, if any). Equal keys transform identically.
+    """
+    h = hashlib.sha1(_params_json(vectorizer).encode("utf8"))
+    vocab = getattr(vectorizer, "vocabulary_", None)
+    if vocab is not None:
+        items = sorted(vocab.items())
+        h.update("\0".join(k for k, _ in items).encode("utf8"))
+        h.update(np.array([v for _, v in items], dtype=np.int64).tobytes())
+    idf = getattr(vectorizer, "idf_", None)
+    if idf is not None:
+        h.update(np.ascontiguousarray(idf).tobytes())
+    return h.hexdigest()
+
+
+def _entry(kind, key):
+    return os.path.join(FEATURE_DIR, kind, key)
+
+
+def _load_matrix(path):
+    return sp.load_npz(os.path.join(path, "X.npz")).tocsr()
+
+
+def _save(path, X, vectorizer=None, **meta):
+    tmp = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    sp.save_npz(os.path.join(tmp, "X.npz"), sp.csr_matrix(X), compressed=False)
+    if vectorizer is not None:
+        joblib.dump(vectorizer, os.path.join(tmp, "vectorizer.joblib"))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf8") as f:
+        json.dump({"shape": list(X.shape), "nnz": int(X.nnz), **meta}, f)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # another process stored the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def fit_transform(vectorizer, texts):
+    """
+    vectorizer.fit_transform(texts), cached by (vectorizer params, texts).
+    Returns (fitted_vectorizer, csr_matrix); on a hit both are loaded from
+    disk and no tokenization happens.
+    """
+    texts = list(texts)
+    key = hashlib.sha1(
+        (_params_json(vectorizer) + texts_digest(texts)).encode("utf8")
+    ).hexdigest()
+    path = _entry("fit", key)
+    if os.path.exists(path):
+        return joblib.load(os.path.join(path, "vectorizer.joblib")), _load_matrix(path)
+    X = vectorizer.fit_transform(texts)
+    _save(path, X, vectorizer, kind="fit_transform", rows=len(texts))
+    return vectorizer, X.tocsr()
+
+
+def transform(vectorizer, texts):
+    """vectorizer.transform(texts), cached by (fitted vectorizer, texts)."""
+    texts = list(texts)
+    key = hashlib.sha1(
+        (fitted_key(vectorizer) + texts_digest(texts)).encode("utf8")
+    ).hexdigest()
+    path = _entry("transform", key)
+    if os.path.exists(path):
+        return _load_matrix(path)
+    X = vectorizer.transform(texts)
+    _save(path, X, kind="transform", rows=len(texts))
+    return X.tocsr()
@@ -0,0 +1,168 @@
+from itertools import islice
+
+import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from src.config import get_section
+
+DEFAULTS = {
+    "vectorizer": "tfidf",
+    "analyzer": "char_wb",
+    "ngram_range": [1, 2],
+    "max_features": 5000,
+    "min_df": 1,
+    "n_features": 2**18,
+    "sublinear_tf": False,
+    "chunksize": 50_000,
+    "n_jobs": 1,
+}
+
+
+class HashingTfidfVectorizer(TransformerMixin, BaseEstimator):
+    """
+    TF-IDF over the hashing trick: n-grams are hashed into n_features
+    columns (as HashingVectorizer) and re-weighted with IDF learned at fit
+    time, then normalized. There is no vocabulary, so fit memory is one
+    document-frequency counter per column (each chunk's counts are added to
+    it as they arrive) and a checkpoint holds only the n_features idf_
+    array. Texts are processed in chunks of `chunksize`, spread over
+    `n_jobs` workers.
+    """
+
+    def __init__(
+        self,
+        analyzer="char_wb",
+        ngram_range=(1, 2),
+        n_features=2**18,
+        lowercase=True,
+        binary=False,
+        sublinear_tf=False,
+        use_idf=True,
+        smooth_idf=True,
+        norm="l2",
+        chunksize=50_000,
+        n_jobs=1,
+    ):
+        self.analyzer = analyzer
+        self.ngram_range = ngram_range
+        self.n_features = n_features
+        self.lowercase = lowercase
+        self.binary = binary
+        self.sublinear_tf = sublinear_tf
+        self.use_idf = use_idf
+        self.smooth_idf = smooth_idf
+        self.norm = norm
+        self.chunksize = chunksize
+        self.n_jobs = n_jobs
+
+    def _hasher(self):
+        return HashingVectorizer(
+            analyzer=self.analyzer,
+            ngram_range=tuple(self.ngram_range),
+            n_features=self.n_features,
+            lowercase=self.lowercase,
+            binary=self.binary,
+            alternate_sign=False,
+            norm=None,
+        )
+
+    def build_analyzer(self):
+        return self._hasher().build_analyzer()
+
+    def _chunks(self, texts):
+        """Lists of at most chunksize texts, taken lazily from `texts`."""
+        it = iter(texts)
+        while chunk := list(islice(it, self.chunksize)):
+            yield chunk
+
+    def _map_chunks(self, fn, texts, ordered=True):
+        """fn over each chunk, as a generator (in completion order if not ordered)."""
+        if self.n_jobs == 1:
+            return map(fn, self._chunks(texts))
+        return Parallel(
+            n_jobs=self.n_jobs,
+            return_as="generator" if ordered else "generator_unordered",
+        )(delayed(fn)(c) for c in self._chunks(texts))
+
+    def _doc_freq(self, texts):
+        counts = self._hasher().transform(texts).tocsc()
+        return np.diff(counts.indptr), len(texts)
+
+    def _update_idf(self, df, n_docs):
+        self.df_ = getattr(self, "df_", 0) + df
+        self.n_docs_ = getattr(self, "n_docs_", 0) + n_docs
+        if self.use_idf:
+            smooth = int(self.smooth_idf)
+            self.idf_ = np.log((self.n_docs_ + smooth) / (self.df_ + smooth)) + 1.0
+        else:
+            self.idf_ = np.ones(self.n_features)
+
+    def fit(self, X, y=None):
+        for attr in ("df_", "n_docs_"):
+            self.__dict__.pop(attr, None)
+        self._update_idf(np.zeros(self.n_features, dtype=np.int64), 0)
+        # chunk counts are summed into df_ as they arrive, in any order
+        for df, n_docs in self._map_chunks(self._doc_freq, X, ordered=False):
+            self._update_idf(df, n_docs)
+        return self
+
+    def partial_fit(self, X, y=None):
+        """Add one chunk's document frequencies to the IDF (out-of-core fitting)."""
+        self._update_idf(*self._doc_freq(list(X)))
+        return self
+
+    def _transform_chunk(self, texts):
+        X = self._hasher().transform(texts).tocsr()
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if self.use_idf:
+            X.data *= self.idf_[X.indices]
+        if self.norm is not None:
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+    def transform(self, X):
+        parts = list(self._map_chunks(self._transform_chunk, X))
+        if not parts:
+            return sp.csr_matrix((0, self.n_features))
+        return sp.vstack(parts, format="csr")
+
+
+def vectorizer_params(overrides=None):
+    """The `features` section of configs/config.yaml with `overrides` applied."""
+    params = dict(DEFAULTS)
+    params.update(get_section("features"))
+    params.update(overrides or {})
+    return params
+
+
+def build_vectorizer(overrides=None):
+    """
+    An unfitted vectorizer as configured by the `features` section:
+    vectorizer: tfidf (vocabulary-based) or hashing (HashingTfidfVectorizer).
+    """
+    p = vectorizer_params(overrides)
+    common = {
+        "analyzer": p["analyzer"],
+        "ngram_range": tuple(p["ngram_range"]),
+        "sublinear_tf": bool(p["sublinear_tf"]),
+    }
+    if p["vectorizer"] == "tfidf":
+        return TfidfVectorizer(
+            max_features=p["max_features"], min_df=p["min_df"], **common
+        )
+    if p["vectorizer"] == "hashing":
+        return HashingTfidfVectorizer(
+            n_features=int(p["n_features"]),
+            chunksize=int(p["chunksize"]),
+            n_jobs=int(p["n_jobs"]),
+            **common,
+        )
+    raise ValueError(
+        f"Unknown features.vectorizer '{p['vectorizer']}', expected tfidf or hashing"
+    )
@@ -1,10 +1,7 @@
-import csv, os
+from src.feedback_store import get_feedback_store
 from src.infer import predict
 from src.taxonomy_lookup import get_all_categories
 
-FEEDBACK_FILE = "data/feedback/feedback.csv"
-os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
-
 
 def cli():
     cats = get_all_categories()
@@ -27,9 +24,7 @@ def cli():
                 label = cats[sel_i - 1][0]
             except Exception:
                 label = sel.strip()
-        with open(FEEDBACK_FILE, "a", newline="", encoding="utf8") as f:
-            writer = csv.writer(f)
-            writer.writerow([t, label])
+        get_feedback_store().append(t, label)
         print("Saved feedback.")
 
 
@@ -0,0 +1,219 @@
+import csv
+import json
+import os
+import struct
+import time
+from contextlib import contextmanager
+from glob import glob
+
+import pandas as pd
+
+from src.config import get_section
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_cfg = get_section("feedback_store")
+STORE_DIR = _cfg.get("dir", "data/feedback/log")
+LEGACY_CSV = "data/feedback/feedback.csv"
+SEGMENT_BYTES = int(_cfg.get("segment_bytes", 4 * 1024 * 1024))
+
+# offset, unix timestamp, len(transaction), len(label); payload; total length.
+# The trailing length lets the last record of a segment be read backwards.
+_HEADER = struct.Struct("<QdII")
+_TRAILER = struct.Struct("<I")
+
+
+@contextmanager
+def _locked(path):
+    """Exclusive inter-process lock held for the duration of the block."""
+    with open(path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _encode(offset, ts, text, label):
+    t = text.encode("utf8")
+    lab = label.encode("utf8")
+    size = _HEADER.size + len(t) + len(lab) + _TRAILER.size
+    return _HEADER.pack(offset, ts, len(t), len(lab)) + t + lab + _TRAILER.pack(size)
+
+
+def _scan(path):
+    """Yield (offset, ts, text, label, end_pos) for every complete record."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        offset, ts, tlen, llen = _HEADER.unpack_from(data, pos)
+        body = pos + _HEADER.size
+        end = body + tlen + llen + _TRAILER.size
+        if end > len(data) or _TRAILER.unpack_from(data, end - _TRAILER.size)[0] != (
+            end - pos
+        ):
+            return
+        text = data[body : body + tlen].decode("utf8")
+        label = data[body + tlen : body + tlen + llen].decode("utf8")
+        yield offset, ts, text, label, end
+        pos = end
+
+
+class FeedbackStore:
+    """
+    Append-only feedback log made of binary segment files.
+
+    Every record gets a monotonically increasing offset. Appends from any
+    number of processes are serialized with a file lock, and each record is
+    written with a single O_APPEND write. Segments roll over at SEGMENT_BYTES
+    and are named after their first offset, so readers that only need the
+    tail (e.g. retraining from a checkpoint) skip old segments entirely.
+    Consumers record how far they have read with commit()/committed().
+    """
+
+    def __init__(self, directory=STORE_DIR, fsync=None):
+        self.dir = directory
+        self.fsync = bool(_cfg.get("fsync", True) if fsync is None else fsync)
+        os.makedirs(os.path.join(self.dir, "checkpoints"), exist_ok=True)
+        self._lock_path = os.path.join(self.dir, ".lock")
+
+    def _segments(self):
+        """[(base_offset, path)] sorted by base offset."""
+        paths = glob(os.path.join(self.dir, "segment-*.log"))
+        return sorted(
+            (int(os.path.basename(p)[len("segment-") : -len(".log")]), p) for p in paths
+        )
+
+    def _next_offset(self, segments):
+        """Next offset to assign; truncates a torn record left by a crash."""
+        if not segments:
+            return 0
+        base, path = segments[-1]
+        size = os.path.getsize(path)
+        if size >= _TRAILER.size:
+            with open(path, "rb") as fh:
+                fh.seek(size - _TRAILER.size)
+                rec_len = _TRAILER.unpack(fh.read(_TRAILER.size))[0]
+                if _HEADER.size + _TRAILER.size <= rec_len <= size:
+                    fh.seek(size - rec_len)
+                    offset, _, tlen, llen = _HEADER.unpack(fh.read(_HEADER.size))
+                    if _HEADER.size + tlen + llen + _TRAILER.size == rec_len:
+                        return offset + 1
+        last_offset, end = base - 1, 0
+        for offset, _, _, _, end in _scan(path):
+            last_offset = offset
+        if end != size:
+            with open(path, "r+b") as fh:
+                fh.truncate(end)
+        return last_offset + 1
+
+    def append_many(self, rows):
+        """
+        Append (transaction, label) pairs; returns the offset of the first.
+        """
+        with _locked(self._lock_path):
+            return self._append_locked(rows)
+
+    def _append_locked(self, rows):
+        rows = [(str(t or ""), str(lab or "")) for t, lab in rows]
+        if not rows:
+            return None
+        segments = self._segments()
+        first = self._next_offset(segments)
+        if not segments or os.path.getsize(segments[-1][1]) >= SEGMENT_BYTES:
+            path = os.path.join(self.dir, f"segment-{first:020d}.log")
+        else:
+            path = segments[-1][1]
+        ts = time.time()
+        payload = b"".join(
+            _encode(first + i, ts, t, lab) for i, (t, lab) in enumerate(rows)
+        )
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, payload)
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        return first
+
+    def append(self, transaction, label):
+        return self.append_many([(transaction, label)])
+
+    def read_from(self, offset=0):
+        """
+        DataFrame (offset, ts, transaction, label) of every record with
+        offset >= `offset`; only the segments that can hold them are read.
+        """
+        segments = self._segments()
+        records = []
+        for i, (base, path) in enumerate(segments):
+            next_base = segments[i + 1][0] if i + 1 < len(segments) else None
+            if next_base is not None and next_base <= offset:
+                continue
+            records.extend(r[:4] for r in _scan(path) if r[0] >= offset)
+        return pd.DataFrame(records, columns=["offset", "ts", "transaction", "label"])
+
+    def end_offset(self):
+        """Offset that the next appended record will get."""
+        with _locked(self._lock_path):
+            return self._next_offset(self._segments())
+
+    def committed(self, consumer):
+        """Next offset `consumer` has not yet processed (0 if never committed)."""
+        path = os.path.join(self.dir, "checkpoints", f"{consumer}.json")
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf8") as f:
+            return int(json.load(f)["offset"])
+
+    def commit(self, consumer, offset):
+        """Atomically record that `consumer` has processed everything < offset."""
+        path = os.path.join(self.dir, "checkpoints", f"{consumer}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump({"offset": int(offset), "ts": time.time()}, f)
+        os.replace(tmp, path)
+
+    def import_csv_if_empty(self, path=LEGACY_CSV):
+        """
+        Seed an empty log from a legacy headerless transaction,label CSV,
+        keeping its row order as offsets 0..N-1. Returns rows imported.
+        """
+        with _locked(self._lock_path):
+            if self._segments() or not os.path.exists(path):
+                return 0
+            with open(path, "r", newline="", encoding="utf8") as f:
+                rows = [(r[0], r[1] if len(r) > 1 else "") for r in csv.reader(f) if r]
+            self._append_locked(rows)
+        return len(rows)
+
+
+_store = None
+
+
+def get_feedback_store():
+    """
+    Shared store for this process; on first use an empty log is seeded from
+    the legacy feedback.csv.
+    """
+    global _store
+    if _store is None:
+        _store = FeedbackStore()
+        n = _store.import_csv_if_empty(LEGACY_CSV)
+        if n:
+            print(f"Imported {n} rows from {LEGACY_CSV} into {STORE_DIR}")
+    return _store
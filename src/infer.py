@@ -1,16 +1,21 @@
-import joblib
+import json
+import os
+import re
+import unicodedata
+
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
+from src import model_registry
+from src.config import get_section
+from src.prediction_cache import PredictionCache, file_fingerprint
 from src.preprocess import normalize_text
-from src.taxonomy_lookup import alias_lookup
+from src.taxonomy_lookup import TAXONOMY_PATH, alias_lookup_many
 
-MODEL_PATH = "artifacts/checkpoints/baseline.joblib"
+MODEL_PATH = model_registry.DEFAULT_PATH
 
-try:
-    model = joblib.load(MODEL_PATH)
-except Exception as e:
-    raise RuntimeError(f"Failed to load model from '{MODEL_PATH}': {e}")
+_cache: Optional[PredictionCache] = None
+_cache_version_seen: Optional[str] = None
 
 
 def _softmax(x: np.ndarray) -> np.ndarray:
@@ -23,18 +28,374 @@ def _softmax(x: np.ndarray) -> np.ndarray:
     return exp / exp.sum(axis=1, keepdims=True)
 
 
-def _to_candidates(
-    classes: List[str], probs_row: np.ndarray, top_k: int = 5
-) -> List[Dict[str, Any]]:
-    """Return list of candidate dicts sorted by probability desc."""
-    idx = np.argsort(probs_row)[::-1]
-    candidates = []
-    for i in idx[:top_k]:
-        candidates.append({"id": str(classes[i]), "prob": float(probs_row[i])})
-    return candidates
+def _model_classes(m) -> Any:
+    """Return classes_ from the model or from the last step of a pipeline."""
+    classes = getattr(m, "classes_", None)
+    if classes is None:
+        try:
+            last = getattr(m, "steps", [])[-1][1] if getattr(m, "steps", None) else None
+            classes = getattr(last, "classes_", None)
+        except Exception:
+            classes = None
+    return classes
+
 
+def _score_batch(m, cleaned: List[str]):
+    """
+    Score all cleaned texts with a single model call.
 
-def predict(texts: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
+    Returns (classes, probs) where probs has shape (len(cleaned), n_classes).
+    Falls back to a softmax over decision_function for models without
+    predict_proba.
+    """
+    try:
+        probs = np.asarray(m.predict_proba(cleaned))
+        classes = _model_classes(m)
+        if classes is None:
+            raise RuntimeError("Model has no classes_ attribute after predict_proba")
+    except Exception:
+        scores_arr = np.asarray(m.decision_function(cleaned))
+        if scores_arr.ndim == 1:
+            scores_arr = np.column_stack([-scores_arr, scores_arr])
+        probs = _softmax(scores_arr)
+        classes = _model_classes(m)
+        if classes is None:
+            classes = [str(i) for i in range(probs.shape[1])]
+    return classes, probs
+
+
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+def _rotl32(x: np.ndarray, r: int) -> np.ndarray:
+    return (x << np.uint32(r)) | (x >> np.uint32(32 - r))
+
+
+def murmurhash3_32(keys: List[bytes]) -> np.ndarray:
+    """
+    Signed 32-bit MurmurHash3 (seed 0) of each byte string, vectorized over
+    the batch; equal to sklearn.utils.murmurhash3_32(key, seed=0).
+    """
+    n = len(keys)
+    lengths = np.fromiter((len(k) for k in keys), dtype=np.int64, count=n)
+    arr = np.array(keys, dtype=bytes)
+    width = arr.dtype.itemsize
+    padded = np.zeros((n, (width // 4 + 1) * 4), dtype=np.uint8)
+    padded[:, :width] = arr.view(np.uint8).reshape(n, width)
+    blocks = padded.view("<u4")
+    c1, c2 = np.uint32(0xCC9E2D51), np.uint32(0x1B873593)
+    h = np.zeros(n, dtype=np.uint32)
+    n_blocks = lengths // 4
+    with np.errstate(over="ignore"):
+        for j in range(int(n_blocks.max(initial=0))):
+            full = n_blocks > j
+            k = _rotl32(blocks[full, j] * c1, 15) * c2
+            hj = _rotl32(h[full] ^ k, 13)
+            h[full] = hj * np.uint32(5) + np.uint32(0xE6546B64)
+        # zero padding makes the block after the last full one the tail word
+        tail = (lengths % 4) > 0
+        k = blocks[np.flatnonzero(tail), n_blocks[tail]]
+        h[tail] ^= _rotl32(k * c1, 15) * c2
+        h ^= lengths.astype(np.uint32)
+        h ^= h >> np.uint32(16)
+        h *= np.uint32(0x85EBCA6B)
+        h ^= h >> np.uint32(13)
+        h *= np.uint32(0xC2B2AE35)
+        h ^= h >> np.uint32(16)
+    return h.view(np.int32).astype(np.int64)
+
+
+class SparseRows:
+    """Minimal CSR stand-in (indptr/indices/data) returned by NumpyModel.transform."""
+
+    def __init__(self, indptr, indices, data):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = (len(indptr) - 1, None)
+
+    def tocsr(self) -> "SparseRows":
+        return self
+
+
+class _TermView:
+    """Column -> feature name, decoded on access from the memory-mapped terms."""
+
+    def __init__(self, terms, col_terms):
+        self._terms = terms
+        self._col_terms = col_terms
+
+    def __len__(self) -> int:
+        return len(self._col_terms)
+
+    def __getitem__(self, col) -> str:
+        return self._terms[self._col_terms[col]].decode("utf8")
+
+
+class NumpyModel:
+    """
+    Pure-NumPy TF-IDF + linear classifier loaded from a src.export_model
+    directory. Reproduces the sklearn pipeline's predict_proba without
+    importing scikit-learn, pandas or joblib.
+
+    Arrays are memory-mapped read-only, so every process scoring with the
+    same export shares one copy of the weights in the page cache. The
+    vocabulary is a sorted array of UTF-8 terms searched with
+    np.searchsorted rather than a per-process dict; exports of hashing
+    vectorizers have no vocabulary and hash n-grams to columns instead.
+
+    It stands in for both pipeline steps: transform() gives sparse rows that
+    predict_proba/decision_function accept in place of raw texts.
+    """
+
+    def __init__(
+        self,
+        meta: Dict[str, Any],
+        idf,
+        coef,
+        intercept,
+        terms=None,
+        term_cols=None,
+        col_terms=None,
+    ):
+        self.meta = meta
+        self.classes_ = np.asarray(meta["classes"], dtype=object)
+        self.terms = terms
+        self.term_cols = term_cols
+        self.col_terms = col_terms
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.n_features = len(idf)
+        self._min_n, self._max_n = meta["ngram_range"]
+        self._token_re = re.compile(meta["token_pattern"])
+        self._ngrams = {
+            "char_wb": self._char_wb_ngrams,
+            "char": self._char_ngrams,
+            "word": self._word_ngrams,
+        }[meta["analyzer"]]
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "NumpyModel":
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(
+                os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None
+            )
+            for name in ("terms", "term_cols", "col_terms", "idf", "coef", "intercept")
+            if os.path.exists(os.path.join(directory, f"{name}.npy"))
+        }
+        return cls(meta, **arrays)
+
+    @property
+    def coef_(self) -> np.ndarray:
+        """(n_classes, n_features) view, as on sklearn linear models."""
+        return self.coef.T
+
+    def get_feature_names_out(self) -> Optional[_TermView]:
+        """Feature names by column; None for hashing exports."""
+        if self.meta.get("hashing"):
+            return None
+        return _TermView(self.terms, self.col_terms)
+
+    def build_analyzer(self):
+        return lambda doc: self._ngrams(self._preprocess(doc))
+
+    def _preprocess(self, doc: str) -> str:
+        if self.meta["lowercase"]:
+            doc = doc.lower()
+        accents = self.meta["strip_accents"]
+        if accents == "ascii":
+            doc = unicodedata.normalize("NFKD", doc)
+            doc = doc.encode("ASCII", errors="ignore").decode("ASCII")
+        elif accents == "unicode" and not doc.isascii():
+            doc = unicodedata.normalize("NFKD", doc)
+            doc = "".join(c for c in doc if not unicodedata.combining(c))
+        return doc
+
+    # The n-gram generators mirror sklearn's VectorizerMixin analyzers.
+    def _char_wb_ngrams(self, doc: str) -> List[str]:
+        ngrams = []
+        for w in _WHITE_SPACES.sub(" ", doc).split():
+            w = " " + w + " "
+            for n in range(self._min_n, self._max_n + 1):
+                offset = 0
+                ngrams.append(w[offset : offset + n])
+                while offset + n < len(w):
+                    offset += 1
+                    ngrams.append(w[offset : offset + n])
+                if offset == 0:
+                    break
+        return ngrams
+
+    def _char_ngrams(self, doc: str) -> List[str]:
+        doc = _WHITE_SPACES.sub(" ", doc)
+        min_n = self._min_n
+        ngrams = list(doc) if min_n == 1 else []
+        min_n = max(min_n, 2)
+        for n in range(min_n, min(self._max_n + 1, len(doc) + 1)):
+            ngrams.extend(doc[i : i + n] for i in range(len(doc) - n + 1))
+        return ngrams
+
+    def _word_ngrams(self, doc: str) -> List[str]:
+        tokens = self._token_re.findall(doc)
+        if self._max_n == 1:
+            return tokens
+        min_n = self._min_n
+        ngrams = list(tokens) if min_n == 1 else []
+        min_n = max(min_n, 2)
+        for n in range(min_n, min(self._max_n + 1, len(tokens) + 1)):
+            ngrams.extend(
+                " ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1)
+            )
+        return ngrams
+
+    def _lookup(self, grams: List[str]) -> np.ndarray:
+        """Column of each n-gram, or -1 if it is not in the vocabulary."""
+        if not grams:
+            return np.empty(0, dtype=np.int64)
+        # search or hash each distinct n-gram of the batch once
+        distinct = dict.fromkeys(grams)
+        q = [g.encode("utf8") for g in distinct]
+        if self.meta.get("hashing"):
+            found = np.abs(murmurhash3_32(q)) % self.n_features
+        else:
+            q = np.array(q)
+            pos = np.searchsorted(self.terms, q)
+            pos[pos == len(self.terms)] = 0
+            found = np.where(self.terms[pos] == q, self.term_cols[pos], -1)
+        distinct.update(zip(distinct, found.tolist()))
+        return np.fromiter(
+            (distinct[g] for g in grams), dtype=np.int64, count=len(grams)
+        )
+
+    def transform(self, texts: List[str]) -> SparseRows:
+        """TF-IDF rows for `texts`, like the sklearn vectorizer's transform."""
+        grams, lengths = [], []
+        for doc in texts:
+            doc_grams = self._ngrams(self._preprocess(doc))
+            grams.extend(doc_grams)
+            lengths.append(len(doc_grams))
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        cols = self._lookup(grams)
+        hit = cols >= 0
+        n_features = len(self.idf)
+        keys, counts = np.unique(rows[hit] * n_features + cols[hit], return_counts=True)
+        r, c = keys // n_features, keys % n_features
+        w = counts.astype(np.float64)
+        if self.meta["binary"]:
+            w[:] = 1.0
+        elif self.meta["sublinear_tf"]:
+            w = np.log(w) + 1.0
+        if self.meta["use_idf"]:
+            w *= self.idf[c]
+        norm = self.meta["norm"]
+        if norm in ("l1", "l2"):
+            sq = np.abs(w) if norm == "l1" else w * w
+            totals = np.bincount(r, weights=sq, minlength=len(texts))
+            if norm == "l2":
+                totals = np.sqrt(totals)
+            w /= totals[r]
+        indptr = np.searchsorted(r, np.arange(len(texts) + 1))
+        return SparseRows(indptr, c, w)
+
+    def decision_function(self, X) -> np.ndarray:
+        """Scores for raw texts or for the SparseRows from transform()."""
+        if not isinstance(X, SparseRows):
+            X = self.transform(X)
+        n_rows = X.shape[0]
+        r = np.repeat(np.arange(n_rows), np.diff(X.indptr))
+        contrib = self.coef[X.indices] * X.data[:, None]
+        scores = np.column_stack(
+            [
+                np.bincount(r, weights=contrib[:, k], minlength=n_rows)
+                for k in range(self.coef.shape[1])
+            ]
+        )
+        scores = scores + self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1.0 - p, p])
+        if self.meta["proba"] == "ovr":
+            # one-vs-rest: a sigmoid per class, normalized (as sklearn's SGD)
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return p / p.sum(axis=1, keepdims=True)
+        return _softmax(scores)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _top_k_indices(probs: np.ndarray, top_k: int) -> np.ndarray:
+    """Column indices of the top_k probabilities per row, sorted desc."""
+    k = max(1, min(top_k, probs.shape[1]))
+    if k < probs.shape[1]:
+        part = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(probs.shape[1]), (probs.shape[0], 1))
+    part_probs = np.take_along_axis(probs, part, axis=1)
+    order = np.argsort(-part_probs, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _score_top_k(m, cleaned: List[str], top_k: int) -> List[List[Tuple[str, float]]]:
+    """Score cleaned texts in one call and return top_k (id, prob) pairs per row."""
+    classes, probs = _score_batch(m, cleaned)
+    class_ids = [str(c) for c in classes]
+    top_idx = _top_k_indices(probs, top_k)
+    top_probs = np.take_along_axis(probs, top_idx, axis=1).tolist()
+    return [
+        [(class_ids[c], p) for c, p in zip(idx_row, prob_row)]
+        for idx_row, prob_row in zip(top_idx.tolist(), top_probs)
+    ]
+
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """
+    Lazily build the prediction cache from the `prediction_cache` section of
+    configs/config.yaml. Returns None if the cache is disabled (max_entries: 0).
+    """
+    global _cache
+    if _cache is None:
+        cfg = get_section("prediction_cache")
+        max_entries = int(cfg.get("max_entries", 100000))
+        if max_entries <= 0:
+            return None
+        _cache = PredictionCache(
+            max_entries=max_entries,
+            ttl_seconds=cfg.get("ttl_seconds"),
+            db_path=cfg.get("db_path"),
+        )
+    return _cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the prediction cache."""
+    cache = get_prediction_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _cache_version(cache: PredictionCache, model_version: str) -> str:
+    """
+    Cache version for the loaded model and current taxonomy file. Entries
+    stored under any other version are dropped the first time it changes.
+    """
+    global _cache_version_seen
+    version = f"{model_version}-{file_fingerprint(TAXONOMY_PATH)}"
+    if version != _cache_version_seen:
+        cache.retain_version(version)
+        _cache_version_seen = version
+    return version
+
+
+def predict(
+    texts: List[str], top_k: int = 5, use_cache: bool = True
+) -> List[Dict[str, Any]]:
     """
     Predict categories for a list of transaction texts.
 
@@ -48,91 +409,79 @@ def predict(texts: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
 
     - Handles models with predict_proba or decision_function.
     - If an alias match is found (token alias), it returns an alias override with high confidence.
+    - Rows without a token alias are scored together in one vectorized call;
+      scores are cached by normalized text (see get_prediction_cache).
     """
     if not isinstance(texts, (list, tuple)):
         texts = [texts]
 
-    cleaned = [normalize_text(t) for t in texts]
+    results: List[Dict[str, Any]] = [None] * len(texts)
+    model_idx = []
+    model_texts = []
 
-    results = []
-
-    for orig_text, ctext in zip(texts, cleaned):
-        try:
-            alias_cat, method = alias_lookup(orig_text)
-        except Exception:
-            alias_cat, method = (None, None)
+    try:
+        alias_hits = alias_lookup_many(texts)
+    except Exception:
+        alias_hits = [(None, None, None)] * len(texts)
 
+    for i, (orig_text, (alias_cat, method, _)) in enumerate(zip(texts, alias_hits)):
         if alias_cat and method == "token":
-            results.append(
-                {
-                    "pred": alias_cat,
-                    "conf": 0.99,
-                    "candidates": [{"id": alias_cat, "prob": 0.99}],
-                    "alias_override": True,
-                }
-            )
+            results[i] = {
+                "pred": alias_cat,
+                "conf": 0.99,
+                "candidates": [{"id": alias_cat, "prob": 0.99}],
+                "alias_override": True,
+            }
             continue
+        model_idx.append(i)
+        model_texts.append(normalize_text(orig_text))
+
+    if not model_idx:
+        return results
+
+    loaded = model_registry.get(MODEL_PATH)
+    model = loaded.model
+
+    # Bank feeds repeat the same descriptors; score each distinct text once.
+    unique_texts = list(dict.fromkeys(model_texts))
+    scored: Dict[str, List[Tuple[str, float]]] = {}
+    cache = get_prediction_cache() if use_cache else None
+    if cache is not None:
+        version = _cache_version(cache, loaded.version)
+        keys = {t: (version, top_k, t) for t in unique_texts}
+        cached = cache.get_many(keys.values())
+        scored = {t: cached[k] for t, k in keys.items() if k in cached}
+
+    to_score = [t for t in unique_texts if t not in scored]
+    if to_score:
         try:
-            probs = model.predict_proba([ctext])
+            fresh = dict(zip(to_score, _score_top_k(model, to_score, top_k)))
+        except Exception:
+            fresh = {}
+        if cache is not None and fresh:
+            cache.put_many({keys[t]: v for t, v in fresh.items()})
+        scored.update(fresh)
+
+    for i, ctext in zip(model_idx, model_texts):
+        pairs = scored.get(ctext)
+        if pairs is None:
             classes = getattr(model, "classes_", None)
             if classes is None:
-                try:
-                    last = (
-                        getattr(model, "steps", [])[-1][1]
-                        if getattr(model, "steps", None)
-                        else None
-                    )
-                    classes = getattr(last, "classes_", None)
-                except Exception:
-                    classes = None
-            if classes is None:
-                raise RuntimeError(
-                    "Model has no classes_ attribute after predict_proba"
-                )
-            probs_row = probs[0]
-        except Exception:
-            try:
-                scores = model.decision_function([ctext])
-                scores_arr = np.asarray(scores)
-                if scores_arr.ndim == 1:
-                    scores_arr = scores_arr.reshape(1, -1)
-                probs_row = _softmax(scores_arr)[0]
-                classes = getattr(model, "classes_", None)
-                if classes is None:
-                    try:
-                        last = (
-                            getattr(model, "steps", [])[-1][1]
-                            if getattr(model, "steps", None)
-                            else None
-                        )
-                        classes = getattr(last, "classes_", None)
-                    except Exception:
-                        classes = None
-                if classes is None:
-                    classes = [str(i) for i in range(probs_row.shape[0])]
-            except Exception as e:
-                classes = getattr(model, "classes_", None)
-                if classes is None:
-                    classes = ["other"]
-                results.append(
-                    {
-                        "pred": str(classes[0]),
-                        "conf": 0.0,
-                        "candidates": [{"id": str(classes[0]), "prob": 0.0}],
-                        "alias_override": False,
-                    }
-                )
-                continue
-        candidates = _to_candidates(classes, probs_row, top_k=top_k)
-        top = candidates[0]
-        results.append(
-            {
-                "pred": top["id"],
-                "conf": float(top["prob"]),
-                "candidates": candidates,
+                classes = ["other"]
+            results[i] = {
+                "pred": str(classes[0]),
+                "conf": 0.0,
+                "candidates": [{"id": str(classes[0]), "prob": 0.0}],
                 "alias_override": False,
             }
-        )
+            continue
+        candidates = [{"id": cid, "prob": p} for cid, p in pairs]
+        results[i] = {
+            "pred": candidates[0]["id"],
+            "conf": float(candidates[0]["prob"]),
+            "candidates": candidates,
+            "alias_override": False,
+        }
 
     return results
 
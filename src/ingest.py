@@ -1,61 +1,206 @@
 import pandas as pd
 import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
 
+from src import storage
+
 CANONICAL_COLS = ["transaction", "merchant", "amount", "label"]
 
+COLUMN_CANDIDATES = {
+    "transaction": ["transaction", "description", "memo", "notes", "text"],
+    "merchant": ["merchant", "vendor", "payee"],
+    "amount": ["amount", "amt", "value"],
+    "label": ["label", "category", "cat"],
+}
+
+CHUNKSIZE = 100_000
+
+
+def resolve_columns(columns):
+    """
+    Map each canonical column to the source columns that can fill it, in
+    priority order. Resolved once per file from its header.
+    """
+    present = set(columns)
+    return {
+        canon: [c for c in cands if c in present]
+        for canon, cands in COLUMN_CANDIDATES.items()
+    }
+
+
+def canonicalize_chunk(df, mapping):
+    """
+    Vectorized canonicalization of one chunk: each canonical column takes the
+    first non-null value among its candidate source columns. Rows without any
+    text column fall back to "merchant description".
+    """
+    out = pd.DataFrame(index=df.index)
+    for canon in CANONICAL_COLS:
+        cols = mapping[canon]
+        if not cols:
+            out[canon] = None
+            continue
+        s = df[cols[0]]
+        for c in cols[1:]:
+            s = s.where(s.notna(), df[c])
+        out[canon] = s
+
+    missing = out["transaction"].isna()
+    if missing.any():
+        empty = pd.Series("", index=df.index)
+        merchant = df["merchant"] if "merchant" in df.columns else empty
+        description = df["description"] if "description" in df.columns else empty
+        both = merchant.notna() & description.notna()
+        fallback = merchant.where(merchant.notna(), description).fillna("")
+        fallback = fallback.where(
+            ~both, merchant.astype(str) + " " + description.astype(str)
+        )
+        out.loc[missing, "transaction"] = fallback[missing]
+    return out.reset_index(drop=True)
+
+
+def ingest_file(path, chunksize=CHUNKSIZE):
+    """Yield canonicalized chunks of one CSV file."""
+    mapping = None
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        if mapping is None:
+            mapping = resolve_columns(chunk.columns)
+        yield canonicalize_chunk(chunk, mapping)
+
+
+def _write_file(path, fh, chunksize):
+    """Canonicalize one file into an open handle; returns (rows, seconds)."""
+    t0 = time.perf_counter()
+    rows = 0
+    for chunk in ingest_file(path, chunksize=chunksize):
+        chunk.to_csv(fh, index=False, header=False)
+        rows += len(chunk)
+    return rows, time.perf_counter() - t0
+
+
+def _ingest_to_shard(job):
+    path, shard_path, chunksize = job
+    with open(shard_path, "w", newline="", encoding="utf8") as fh:
+        rows, seconds = _write_file(path, fh, chunksize)
+    return path, shard_path, rows, seconds
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    # every file's parts must share one schema; ingest reads all columns as str
+    return pa.schema([pa.field(c, pa.string()) for c in CANONICAL_COLS])
+
+
+def _ingest_to_parts(job):
+    """Canonicalize one file into Parquet parts named after its position."""
+    path, directory, prefix, chunksize = job
+    t0 = time.perf_counter()
+    parts = storage.PartWriter(directory, prefix=prefix, schema=_parquet_schema())
+    rows = 0
+    for chunk in ingest_file(path, chunksize=chunksize):
+        parts.write(chunk)
+        rows += len(chunk)
+    parts.close()
+    return path, rows, time.perf_counter() - t0
+
+
+def _write_parquet(files, tmp, chunksize, workers):
+    os.makedirs(tmp)
+    jobs = [(f, tmp, f"{i:06d}", chunksize) for i, f in enumerate(files)]
+    total = 0
+    if workers > 1 and len(files) > 1:
+        # workers write their parts straight into the output directory
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_ingest_to_parts, jobs))
+    else:
+        results = map(_ingest_to_parts, jobs)
+    for f, rows, seconds in results:
+        print(f"  {f}: {rows} rows in {seconds:.2f}s")
+        total += rows
+    if total == 0:
+        parts = storage.PartWriter(tmp, schema=_parquet_schema())
+        parts.finish()
+    return total
+
+
+def _write_csv(files, tmp, chunksize, workers, out_dir):
+    total = 0
+    with open(tmp, "w", newline="", encoding="utf8") as fh:
+        pd.DataFrame(columns=CANONICAL_COLS).to_csv(fh, index=False)
+        if workers > 1 and len(files) > 1:
+            shard_dir = tempfile.mkdtemp(prefix="ingest_shards_", dir=out_dir)
+            try:
+                jobs = [
+                    (f, os.path.join(shard_dir, f"{i:06d}.csv"), chunksize)
+                    for i, f in enumerate(files)
+                ]
+                with ProcessPoolExecutor(max_workers=workers) as ex:
+                    for f, shard, rows, seconds in ex.map(_ingest_to_shard, jobs):
+                        print(f"  {f}: {rows} rows in {seconds:.2f}s")
+                        with open(shard, "r", newline="", encoding="utf8") as sh:
+                            shutil.copyfileobj(sh, fh)
+                        total += rows
+            finally:
+                shutil.rmtree(shard_dir, ignore_errors=True)
+        else:
+            for f in files:
+                rows, seconds = _write_file(f, fh, chunksize)
+                print(f"  {f}: {rows} rows in {seconds:.2f}s")
+                total += rows
+    return total
+
+
+def ingest_folder(
+    folder="data/raw",
+    out="data/raw/canonical_transactions",
+    chunksize=CHUNKSIZE,
+    workers=1,
+    format=None,
+):
+    """
+    Stream every CSV in `folder` through canonicalization in chunks of
+    `chunksize` rows and write them to the dataset `out` (see src.storage;
+    `format` overrides storage.format), so memory stays bounded by the
+    chunk size rather than the input size. Returns the number of rows written.
+
+    With workers > 1, files are canonicalized in a process pool: as Parquet
+    each file becomes its own run of part files, as CSV per-file shards are
+    concatenated in sorted file order. Either way the output is identical
+    to the serial path.
+    """
+    out, fmt = storage.target(out, format)
+    # neither format of the canonical output is itself an input
+    stem = os.path.splitext(out)[0]
+    outputs = {os.path.abspath(stem + ".csv"), os.path.abspath(stem + ".parquet")}
+    files = sorted(
+        f
+        for f in glob(os.path.join(folder, "*.csv"))
+        if os.path.abspath(f) not in outputs
+    )
+    out_dir = os.path.dirname(out) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = out + ".tmp"
+    storage.remove(tmp)
+    t0 = time.perf_counter()
+    try:
+        if fmt == "parquet":
+            total = _write_parquet(files, tmp, chunksize, workers)
+        else:
+            total = _write_csv(files, tmp, chunksize, workers, out_dir)
+    except BaseException:
+        storage.remove(tmp)
+        raise
+    storage.replace(tmp, out)
 
-def canonicalize_row(row):
-    mapping = {}
-    text_candidates = ["transaction", "description", "memo", "notes", "text"]
-    merchant_candidates = ["merchant", "vendor", "payee"]
-    amount_candidates = ["amount", "amt", "value"]
-    label_candidates = ["label", "category", "cat"]
-
-    for c in text_candidates:
-        if c in row.index and pd.notna(row[c]):
-            mapping["transaction"] = row[c]
-            break
-
-    for c in merchant_candidates:
-        if c in row.index and pd.notna(row[c]):
-            mapping["merchant"] = row[c]
-            break
-
-    for c in amount_candidates:
-        if c in row.index and pd.notna(row[c]):
-            mapping["amount"] = row[c]
-            break
-
-    for c in label_candidates:
-        if c in row.index and pd.notna(row[c]):
-            mapping["label"] = row[c]
-            break
-
-    return mapping
-
-
-def ingest_folder(folder="data/raw", out="data/raw/canonical_transactions.csv"):
-    files = glob(os.path.join(folder, "*.csv"))
-    rows = []
-
-    for f in files:
-        df = pd.read_csv(f, low_memory=False)
-        for _, r in df.iterrows():
-            mapped = canonicalize_row(r)
-            if "transaction" not in mapped:
-                mapped["transaction"] = " ".join(
-                    str(v)
-                    for v in [r.get("merchant", ""), r.get("description", "")]
-                    if pd.notna(v)
-                )
-            rows.append({c: mapped.get(c, None) for c in CANONICAL_COLS})
-
-    out_df = pd.DataFrame(rows)
-    os.makedirs(os.path.dirname(out), exist_ok=True)
-    out_df.to_csv(out, index=False)
-    print(f"Ingested {len(files)} files -> {out} ({len(out_df)} rows)")
-    return out_df
+    elapsed = time.perf_counter() - t0
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(f"Ingested {len(files)} files -> {out} ({total} rows, {rate:,.0f} rows/s)")
+    return total
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from src.config import get_section
+from src.prediction_cache import file_fingerprint
+
+BASELINE_PATH = os.path.join("artifacts", "checkpoints", "baseline.joblib")
+# Checkpoint served by infer/explain (configs/config.yaml: inference.model_path).
+DEFAULT_PATH = get_section("inference").get("model_path", BASELINE_PATH)
+# Serve the NumPy export (src.export_model) of a checkpoint when an up-to-date
+# one exists, so scoring processes never import scikit-learn or joblib.
+LEAN = bool(get_section("inference").get("lean", True))
+
+
+class LoadedModel:
+    """
+    An immutable snapshot of one loaded checkpoint.
+
+    Callers should fetch a snapshot once per request and use it throughout;
+    a reload swaps the registry entry but never mutates a snapshot, so
+    in-flight requests finish on the model they started with.
+    """
+
+    def __init__(self, path: str, model: Any, version: str):
+        self.path = path
+        self.model = model
+        self.version = version
+        steps = getattr(model, "steps", None) or []
+        self.vectorizer = steps[0][1] if len(steps) > 1 else None
+        self.classifier = steps[-1][1] if steps else None
+        if not steps and hasattr(model, "transform"):
+            # a src.infer.NumpyModel plays both pipeline steps
+            self.vectorizer = self.classifier = model
+        self._feature_names = None
+
+    @property
+    def feature_names(self):
+        """
+        Vectorizer feature names, built once per loaded checkpoint. None for
+        hashing vectorizers, which have no vocabulary.
+        """
+        if self._feature_names is None and hasattr(
+            self.vectorizer, "get_feature_names_out"
+        ):
+            self._feature_names = self.vectorizer.get_feature_names_out()
+        return self._feature_names
+
+
+_entries: Dict[Any, LoadedModel] = {}
+# checkpoint version whose reload failed, per key; not retried until it changes
+_failed: Dict[Any, str] = {}
+_lock = threading.Lock()
+
+
+def _load(path: str, lean: bool) -> Any:
+    if lean:
+        from src.export_model import fresh_export
+
+        export_dir = fresh_export(path)
+        if export_dir is not None:
+            from src.infer import NumpyModel
+
+            return NumpyModel.load(export_dir)
+    import joblib
+
+    return joblib.load(path)
+
+
+def get(path: str = DEFAULT_PATH, lean: Optional[bool] = None) -> LoadedModel:
+    """
+    Return the loaded model for `path`, loading it on first use.
+
+    The checkpoint's fingerprint (size + mtime) is checked on every call; if
+    the file changed, the new checkpoint is loaded and swapped in atomically.
+    A failed reload keeps serving the previous model, and that checkpoint
+    version is not retried until the file changes again.
+
+    With lean=True (default: inference.lean) the model is a
+    src.infer.NumpyModel memory-mapped from the checkpoint's export when that
+    export is up to date, so processes on one host share its weights.
+    lean=False always unpickles the sklearn pipeline.
+    """
+    lean = LEAN if lean is None else lean
+    key = (path, lean)
+    version = file_fingerprint(path)
+    entry = _entries.get(key)
+    if entry is not None and (entry.version == version or _failed.get(key) == version):
+        return entry
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and (
+            entry.version == version or _failed.get(key) == version
+        ):
+            return entry
+        if not os.path.exists(path):
+            if entry is not None:
+                return entry
+            raise FileNotFoundError(f"Model not found at {path}")
+        try:
+            model = _load(path, lean)
+        except Exception as e:
+            if entry is not None:
+                print(f"Reload of '{path}' failed, keeping previous model: {e}")
+                _failed[key] = version
+                return entry
+            raise RuntimeError(f"Failed to load model from '{path}': {e}")
+        entry = LoadedModel(path, model, version)
+        _entries[key] = entry
+        _failed.pop(key, None)
+        return entry
+
+
+def peek(
+    path: str = DEFAULT_PATH, lean: Optional[bool] = None
+) -> Optional[LoadedModel]:
+    """Return the currently loaded model for `path` without loading it."""
+    return _entries.get((path, LEAN if lean is None else lean))
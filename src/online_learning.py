@@ -0,0 +1,192 @@
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
+
+from src import storage
+from src.config import get_section
+from src.feedback_store import get_feedback_store
+from src.preprocess import normalize_series
+from src.taxonomy_lookup import load_taxonomy
+
+_cfg = get_section("online_learning")
+ONLINE_DIR = _cfg.get("dir", "artifacts/checkpoints/online")
+MANIFEST_PATH = os.path.join(ONLINE_DIR, "manifest.json")
+LATEST_PATH = os.path.join(ONLINE_DIR, "latest.joblib")
+PROCESSED_FILE = "data/processed/processed"
+# feedback_store consumer name for the online model's checkpoint
+CONSUMER = "online_learning"
+
+
+def make_vectorizer():
+    """Stateless char n-gram features: nothing to fit, nothing to grow."""
+    return HashingVectorizer(
+        analyzer="char_wb",
+        ngram_range=(1, 2),
+        n_features=int(_cfg.get("n_features", 2**18)),
+        alternate_sign=False,
+    )
+
+
+def make_classifier():
+    return SGDClassifier(
+        loss="log_loss",
+        alpha=float(_cfg.get("alpha", 1e-5)),
+        random_state=42,
+    )
+
+
+def _load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, "r", encoding="utf8") as f:
+        return json.load(f)
+
+
+def _write_atomic_json(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf8") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _save_version(pipe, manifest, **info):
+    """Write model_vNNNN.joblib, repoint latest.joblib and update the manifest."""
+    os.makedirs(ONLINE_DIR, exist_ok=True)
+    version = (manifest or {}).get("version", 0) + 1
+    path = os.path.join(ONLINE_DIR, f"model_v{version:04d}.joblib")
+    joblib.dump(pipe, path)
+    tmp = LATEST_PATH + ".tmp"
+    joblib.dump(pipe, tmp)
+    os.replace(tmp, LATEST_PATH)
+
+    history = (manifest or {}).get("history", [])
+    history.append({"version": version, "path": path, "created": time.time(), **info})
+    manifest = {
+        "version": version,
+        "latest": path,
+        "feedback_offset": info.get("feedback_offset", 0),
+        "history": history,
+    }
+    _write_atomic_json(MANIFEST_PATH, manifest)
+    print(f"Saved online model v{version} to {path} ({LATEST_PATH})")
+    return manifest
+
+
+def _partial_fit_epochs(vec, clf, texts, labels, epochs, classes=None, seed=0):
+    rng = np.random.default_rng(seed)
+    X = vec.transform(texts)
+    y = np.asarray(labels)
+    for _ in range(epochs):
+        order = rng.permutation(X.shape[0])
+        clf.partial_fit(X[order], y[order], classes=classes)
+        classes = None
+
+
+def bootstrap(processed_csv=PROCESSED_FILE, epochs=None, chunksize=None):
+    """
+    Train version 1 of the online model from the processed dataset.
+
+    The class set is fixed here (taxonomy ids plus every label in the data),
+    since partial_fit cannot add classes later. The data is streamed in
+    chunks, so this also works for datasets larger than memory.
+    """
+    epochs = int(epochs or _cfg.get("epochs", 5))
+    chunksize = int(chunksize or _cfg.get("chunksize", 50_000))
+    t0 = time.perf_counter()
+    labels = storage.read_table(processed_csv, columns=["label"])["label"].dropna()
+    classes = np.array(
+        sorted(set(labels.astype(str)) | {c["id"] for c in load_taxonomy()})
+    )
+
+    vec, clf = make_vectorizer(), make_classifier()
+    rows = 0
+    for epoch in range(epochs):
+        for chunk in storage.iter_batches(
+            processed_csv, ["text", "label"], batch_size=chunksize
+        ):
+            chunk = chunk.dropna(subset=["label"])
+            _partial_fit_epochs(
+                vec,
+                clf,
+                chunk["text"].fillna("").astype(str),
+                chunk["label"].astype(str),
+                1,
+                classes=classes if not hasattr(clf, "classes_") else None,
+                seed=epoch,
+            )
+            rows += len(chunk) if epoch == 0 else 0
+
+    seconds = time.perf_counter() - t0
+    print(
+        f"Bootstrapped online model on {rows} rows x {epochs} epochs in {seconds:.2f}s"
+    )
+    return _save_version(
+        make_pipeline(vec, clf),
+        None,
+        kind="bootstrap",
+        rows=rows,
+        seconds=seconds,
+        feedback_offset=0,
+    )
+
+
+def update_from_feedback(epochs=None):
+    """
+    Apply feedback records appended since this consumer's checkpoint with
+    partial_fit and save the result as a new version. Only the tail of the
+    feedback log is read, so cost is proportional to the number of new rows,
+    not to the size of the training history.
+    """
+    manifest = _load_manifest()
+    if manifest is None:
+        print("No online model yet; bootstrapping from processed data first.")
+        manifest = bootstrap()
+
+    t0 = time.perf_counter()
+    store = get_feedback_store()
+    # the manifest is written before the store checkpoint, so after a crash
+    # between the two it is ahead; resume from it rather than re-learn rows
+    committed = store.committed(CONSUMER)
+    offset = max(committed, manifest.get("feedback_offset", 0))
+    if offset > committed:
+        store.commit(CONSUMER, offset)
+    fb = store.read_from(offset)
+    if fb.empty:
+        print(f"No new feedback since offset {offset}.")
+        return manifest
+    new_offset = int(fb["offset"].iloc[-1]) + 1
+
+    pipe = joblib.load(manifest["latest"])
+    vec, clf = pipe.steps[0][1], pipe.steps[-1][1]
+    fb["label"] = fb["label"].str.strip()
+    usable = fb[fb["label"].isin(set(clf.classes_))]
+    if len(usable) < len(fb):
+        print(f"Skipping {len(fb) - len(usable)} feedback rows with unknown labels.")
+    if usable.empty:
+        store.commit(CONSUMER, new_offset)
+        return manifest
+
+    epochs = int(epochs or _cfg.get("epochs", 5))
+    texts = normalize_series(usable["transaction"])
+    _partial_fit_epochs(vec, clf, texts, usable["label"], epochs)
+    seconds = time.perf_counter() - t0
+    print(
+        f"Learned from {len(usable)} feedback rows "
+        f"(offsets {offset}-{new_offset - 1}) in {seconds:.2f}s"
+    )
+    manifest = _save_version(
+        pipe,
+        manifest,
+        kind="feedback",
+        rows=len(usable),
+        seconds=seconds,
+        feedback_offset=new_offset,
+    )
+    store.commit(CONSUMER, new_offset)
+    return manifest
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+def file_fingerprint(*paths: str) -> str:
+    """
+    Short hash of (path, size, mtime) for each file. Changes whenever any of
+    the files is rewritten, so it can be used as a cache version.
+    """
+    h = hashlib.sha1()
+    for p in paths:
+        try:
+            st = os.stat(p)
+            h.update(f"{p}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{p}:missing;".encode())
+    return h.hexdigest()[:16]
+
+
+class PredictionCache:
+    """
+    Two-tier LRU/TTL cache for model scores.
+
+    Keys are (version, top_k, normalized_text) tuples; values are lists of
+    (category_id, prob) pairs. The in-process tier is an OrderedDict capped at
+    max_entries. If db_path is set, entries are also written to a SQLite file
+    so they survive restarts; memory misses fall through to it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100000,
+        ttl_seconds: Optional[float] = None,
+        db_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._mem: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "version TEXT, top_k INTEGER, text TEXT, ts REAL, value TEXT, "
+                "PRIMARY KEY (version, top_k, text))"
+            )
+            self._db.commit()
+
+    def _expired(self, ts: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - ts > self.ttl_seconds
+
+    def get_many(self, keys: Iterable[Tuple]) -> Dict[Tuple, Any]:
+        """Return {key: value} for the keys present and not expired."""
+        now = time.time()
+        found = {}
+        missing = []
+        with self._lock:
+            for k in keys:
+                entry = self._mem.get(k)
+                if entry is not None and not self._expired(entry[0], now):
+                    self._mem.move_to_end(k)
+                    found[k] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._mem[k]
+                    missing.append(k)
+            self.hits += len(found)
+
+            if self._db is not None and missing:
+                still_missing = []
+                for k in missing:
+                    row = self._db.execute(
+                        "SELECT ts, value FROM predictions "
+                        "WHERE version = ? AND top_k = ? AND text = ?",
+                        k,
+                    ).fetchone()
+                    if row is not None and not self._expired(row[0], now):
+                        value = [tuple(c) for c in json.loads(row[1])]
+                        found[k] = value
+                        self._mem_put(k, row[0], value)
+                        self.disk_hits += 1
+                    else:
+                        still_missing.append(k)
+                missing = still_missing
+            self.misses += len(missing)
+        return found
+
+    def _mem_put(self, key: Tuple, ts: float, value: Any) -> None:
+        self._mem[key] = (ts, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def put_many(self, items: Dict[Tuple, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            for k, v in items.items():
+                self._mem_put(k, now, v)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    [(*k, now, json.dumps(v)) for k, v in items.items()],
+                )
+                self._db.commit()
+
+    def retain_version(self, version: str) -> None:
+        """Drop every entry that was stored under a different version."""
+        with self._lock:
+            for k in [k for k in self._mem if k[0] != version]:
+                del self._mem[k]
+            if self._db is not None:
+                self._db.execute(
+                    "DELETE FROM predictions WHERE version != ?", (version,)
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM predictions")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._mem),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+        }
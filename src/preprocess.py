@@ -1,28 +1,125 @@
-import pandas as pd
+import numpy as np
 import re
+import sys
 import unicodedata
+from functools import lru_cache
 
+from src.config import get_section
 
-def normalize_text(s):
-    if pd.isna(s):
-        return ""
-    s = str(s)
+_NUM_RE = re.compile(r"\d{4,}")
+_NONWORD_RE = re.compile(r"[\W_]+")
+_SPACE_RE = re.compile(r"\s+")
+
+NORMALIZE_CACHE_SIZE = int(get_section("normalization").get("cache_size", 200000))
+
+# pandas is imported inside the Series helpers below so that normalize_text,
+# which is all the lean inference path needs, does not pull it in.
+
+
+def _is_missing(s):
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        return pd.isna(s)
+    return s is None or (isinstance(s, float) and s != s)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_str(s):
     s = unicodedata.normalize("NFKD", s)
     s = s.lower()
-    s = re.sub(r"\d{4,}", " <NUM> ", s)
-    s = re.sub(r"[\W_]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _NUM_RE.sub(" <NUM> ", s)
+    s = _NONWORD_RE.sub(" ", s)
+    s = _SPACE_RE.sub(" ", s).strip()
     return s
 
 
+def normalize_text(s):
+    """
+    Normalize one transaction string. Results are memoized in a bounded LRU
+    shared by every caller in the process (see normalize_cache_stats).
+    """
+    if _is_missing(s):
+        return ""
+    return _normalize_str(str(s))
+
+
+def normalize_cache_stats():
+    """Size and hit rate of the normalize_text memo."""
+    info = _normalize_str.cache_info()
+    total = info.hits + info.misses
+    return {
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / total if total else 0.0,
+    }
+
+
+def intern_strings(s):
+    """
+    Return `s` with equal strings sharing a single interned object, which
+    shrinks large text columns that repeat the same values (e.g. after
+    read_csv).
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(s)
+    lookup = np.array(
+        [sys.intern(x) if isinstance(x, str) else x for x in uniques] + [np.nan],
+        dtype=object,
+    )
+    return pd.Series(lookup[codes], index=s.index, dtype=object)
+
+
+def normalize_series(s, intern=False):
+    """
+    Vectorized normalize_text over a Series; output is identical to
+    s.apply(normalize_text). Distinct raw strings are normalized once with
+    pandas .str operations and mapped back onto the original rows.
+
+    With intern=True, raw strings that normalize to the same text also share
+    one output object.
+    """
+    import pandas as pd
+
+    s = pd.Series(s, dtype=object)
+    values = s.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+        values = values.copy()
+        mask = pd.notna(values)
+        values[mask] = [str(v) for v in values[mask]]
+    codes, uniques = pd.factorize(values)
+    # object dtype keeps .str on Python's re, matching normalize_text exactly.
+    u = pd.Series(uniques, dtype=object)
+    u = (
+        u.str.normalize("NFKD")
+        .str.lower()
+        .str.replace(_NUM_RE, " <NUM> ", regex=True)
+        .str.replace(_NONWORD_RE, " ", regex=True)
+        .str.replace(_SPACE_RE, " ", regex=True)
+        .str.strip()
+    )
+    out = u.to_numpy(dtype=object)
+    if intern:
+        out = np.array([sys.intern(x) for x in out], dtype=object)
+    lookup = np.append(out, "")
+    return pd.Series(lookup[codes], index=s.index, dtype=object)
+
+
 def load_and_process(
-    path_in="data/raw/transaction_synthetic.csv",
-    path_out="data/processed/processed.csv",
+    path_in="data/raw/transaction_synthetic",
+    path_out="data/processed/processed",
 ):
-    df = pd.read_csv(path_in)
-    df["text"] = df["transaction"].apply(normalize_text)
-    df[["text", "label"]].to_csv(path_out, index=False)
-    print("Wrote", path_out)
+    """
+    Normalize the transaction text of dataset `path_in` and write text,label
+    to dataset `path_out` (both src.storage paths, so Parquet or CSV).
+    """
+    from src import storage
+
+    df = storage.read_table(path_in)
+    df["text"] = normalize_series(df["transaction"], intern=True)
+    print("Wrote", storage.write_table(df[["text", "label"]], path_out))
     return df
 
 
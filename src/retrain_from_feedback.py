@@ -1,19 +1,20 @@
 import pandas as pd
-import os
-from src.preprocess import load_and_process, normalize_text
-from src.train_baseline import train
+from src import storage
+from src.preprocess import load_and_process, normalize_series, intern_strings
+from src.feedback_store import get_feedback_store
+from src.train import train
+from src.online_learning import update_from_feedback
 
-FEEDBACK_FILE = "data/feedback/feedback.csv"
-PROCESSED_FILE = "data/processed/processed.csv"
-MERGED_FILE = "data/processed/merged_for_retrain.csv"
+PROCESSED_FILE = "data/processed/processed"
+MERGED_FILE = "data/processed/merged_for_retrain"
 
 
 def merge_and_retrain():
-    if not os.path.exists(PROCESSED_FILE):
+    if not storage.exists(PROCESSED_FILE):
         print("Processed file not found. Running preprocessing...")
         load_and_process()
 
-    base = pd.read_csv(PROCESSED_FILE)
+    base = storage.read_table(PROCESSED_FILE)
     if "text" in base.columns:
         base_df = base[["text", "label"]].dropna(subset=["label"])
     elif "transaction" in base.columns:
@@ -27,21 +28,40 @@ def merge_and_retrain():
             "Processed file must contain 'text' or 'transaction' and 'label'."
         )
 
-    if not os.path.exists(FEEDBACK_FILE):
-        print("No feedback file found. Nothing to merge.")
+    base_df["text"] = intern_strings(base_df["text"])
+
+    fb = get_feedback_store().read_from(0)[["transaction", "label"]]
+    if fb.empty:
+        print("No feedback found. Nothing to merge.")
         return
 
-    fb = pd.read_csv(FEEDBACK_FILE, header=None, names=["transaction", "label"])
-    fb["text"] = fb["transaction"].astype(str).apply(normalize_text)
+    fb["text"] = normalize_series(fb["transaction"].astype(str), intern=True)
     fb = fb[["text", "label"]]
 
-    merged = pd.concat([base_df, fb], ignore_index=True)
-    os.makedirs(os.path.dirname(MERGED_FILE), exist_ok=True)
-    merged.to_csv(MERGED_FILE, index=False)
-    print(f"Merged dataset saved to {MERGED_FILE} (rows={len(merged)})")
-    train(input_csv=MERGED_FILE)
+    # partitioned by source (as Parquet), so either side can be read alone
+    # with a filter such as [("source", "=", "feedback")]
+    merged = pd.concat(
+        [base_df.assign(source="base"), fb.assign(source="feedback")],
+        ignore_index=True,
+    )
+    out = storage.write_table(merged, MERGED_FILE, partition_by=["source"])
+    print(f"Merged dataset saved to {out} (rows={len(merged)})")
+    train(path=MERGED_FILE)
     print("Retraining complete. Model updated.")
 
 
+def incremental_retrain():
+    """
+    Update the online (hashing + SGD) model with only the feedback added since
+    its last version, instead of retraining the baseline from scratch.
+    """
+    return update_from_feedback()
+
+
 if __name__ == "__main__":
-    merge_and_retrain()
+    import sys
+
+    if "--incremental" in sys.argv:
+        incremental_retrain()
+    else:
+        merge_and_retrain()
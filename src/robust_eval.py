@@ -1,32 +1,87 @@
 import os
 import json
+import time
 import joblib
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from joblib import Parallel, delayed
 from sklearn.pipeline import make_pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (
     classification_report,
     confusion_matrix,
+    f1_score,
     ConfusionMatrixDisplay,
 )
-from sklearn.model_selection import GroupShuffleSplit
+from sklearn.model_selection import GroupShuffleSplit, StratifiedGroupKFold
 
+from src import feature_store, storage
+from src.features import build_vectorizer
 
-def merchant_proxy(text):
-    if not isinstance(text, str) or text.strip() == "":
-        return "UNK"
-    return text.split()[0].lower()
+RUNS_DIR = "artifacts/runs/robust_eval"
+
+
+def merchant_keys(texts):
+    """Merchant proxy per text: its lowercased first token, "UNK" if empty."""
+    first = texts.astype("string").str.split(n=1).str[0].str.lower()
+    return first.fillna("UNK").astype(object)
+
+
+def _fit_fold(X, y, train_idx, test_idx, random_state):
+    vec, Xv_train = feature_store.fit_transform(
+        build_vectorizer(),
+        X[train_idx],
+    )
+    clf = LogisticRegression(
+        max_iter=1000, class_weight="balanced", random_state=random_state
+    )
+    clf.fit(Xv_train, y[train_idx])
+    y_pred = clf.predict(feature_store.transform(vec, X[test_idx]))
+    return make_pipeline(vec, clf), test_idx, y_pred
+
+
+def _new_run_dir(mode):
+    # timestamp + pid keeps concurrent runs from sharing a directory
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{mode}-{os.getpid()}"
+    path = os.path.join(RUNS_DIR, run_id)
+    os.makedirs(path)
+    return path
+
+
+def _save_confusion_matrix(y_true, y_pred, classes, out_path):
+    labels_in_test = [label for label in classes if label in set(y_true)]
+    if not labels_in_test:
+        print("No labels in test set match model classes. Skipping confusion matrix.")
+        return
+    cm = confusion_matrix(y_true, y_pred, labels=labels_in_test)
+    disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=labels_in_test)
+    fig, ax = plt.subplots(figsize=(6, 6))
+    disp.plot(ax=ax, cmap="Blues", colorbar=False)
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=150)
+    plt.close(fig)
+    print(f"Saved confusion matrix to {out_path}")
 
 
 def run_merchant_split_eval(
-    processed_csv="data/processed/processed.csv", random_state=42
+    processed_csv="data/processed/processed",
+    random_state=42,
+    mode="shuffle",
+    n_splits=5,
+    n_jobs=-1,
 ):
-    os.makedirs("artifacts/metrics", exist_ok=True)
-    os.makedirs("artifacts/checkpoints", exist_ok=True)
-    df = pd.read_csv(processed_csv)
+    """
+    Evaluate on merchants unseen at training time. mode="shuffle" holds out
+    20% of merchants once; mode="kfold" runs n_splits group folds in
+    parallel and reports on the pooled out-of-fold predictions. Outputs go
+    to a fresh directory under RUNS_DIR, which is returned.
+    """
+    if mode not in ("shuffle", "kfold"):
+        raise ValueError(f"Unknown mode '{mode}', expected 'shuffle' or 'kfold'.")
+    df = storage.read_table(processed_csv)
     if "text" not in df.columns:
         if "transaction" in df.columns:
             df = df.rename(columns={"transaction": "text"})
@@ -35,58 +90,81 @@ def run_merchant_split_eval(
     if "label" not in df.columns:
         raise ValueError("Missing 'label' column in input CSV.")
 
-    df["merchant_proxy"] = df["text"].apply(merchant_proxy)
-    print("Unique merchant proxies:", df["merchant_proxy"].nunique())
-    gss = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=random_state)
-    train_idx, test_idx = next(gss.split(df, groups=df["merchant_proxy"]))
-    train = df.iloc[train_idx]
-    test = df.iloc[test_idx]
-
-    X_train = train["text"].astype(str)
-    y_train = train["label"].astype(str)
-    X_test = test["text"].astype(str)
-    y_test = test["label"].astype(str)
-
-    pipe = make_pipeline(
-        TfidfVectorizer(ngram_range=(1, 2), analyzer="char_wb", max_features=5000),
-        LogisticRegression(
-            max_iter=1000, class_weight="balanced", random_state=random_state
-        ),
+    groups, merchants = pd.factorize(merchant_keys(df["text"]), sort=True)
+    print("Unique merchant proxies:", len(merchants))
+    X = df["text"].astype(str).to_numpy()
+    y = df["label"].astype(str).to_numpy()
+
+    if mode == "shuffle":
+        splitter = GroupShuffleSplit(
+            n_splits=1, test_size=0.2, random_state=random_state
+        )
+        splits = list(splitter.split(X, groups=groups))
+    else:
+        splitter = StratifiedGroupKFold(
+            n_splits=n_splits, shuffle=True, random_state=random_state
+        )
+        splits = list(splitter.split(X, y, groups=groups))
+
+    folds = Parallel(n_jobs=n_jobs if len(splits) > 1 else 1)(
+        delayed(_fit_fold)(X, y, tr, te, random_state) for tr, te in splits
     )
-    pipe.fit(X_train, y_train)
-    y_pred = pipe.predict(X_test)
-    print("=== Merchant-group split evaluation ===")
+    test_idx = np.concatenate([te for _, te, _ in folds])
+    y_pred = np.concatenate([p for _, _, p in folds])
+    y_test = y[test_idx]
+    fold_f1 = [
+        float(f1_score(y[te], p, average="macro", zero_division=0))
+        for _, te, p in folds
+    ]
+
+    run_dir = _new_run_dir(mode)
+    print(f"=== Merchant-group {mode} evaluation ===")
+    if mode == "kfold":
+        print(f"{n_splits}-fold macro F1 scores:", np.round(fold_f1, 4))
+        print("Mean:", np.mean(fold_f1), "Std:", np.std(fold_f1))
     report_dict = classification_report(
         y_test, y_pred, output_dict=True, zero_division=0
     )
     print(classification_report(y_test, y_pred, digits=4, zero_division=0))
 
-    with open(
-        "artifacts/metrics/classification_report.json", "w", encoding="utf-8"
-    ) as f:
+    report_path = os.path.join(run_dir, "classification_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
         json.dump(report_dict, f, indent=2, ensure_ascii=False)
-    print("Saved classification report to artifacts/metrics/classification_report.json")
-
-    labels_in_test = [label for label in pipe.classes_ if label in set(y_test)]
-    if labels_in_test:
-        cm = confusion_matrix(y_test, y_pred, labels=labels_in_test)
-        disp = ConfusionMatrixDisplay(
-            confusion_matrix=cm, display_labels=labels_in_test
+    print(f"Saved classification report to {report_path}")
+    with open(os.path.join(run_dir, "run.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "mode": mode,
+                "processed_csv": processed_csv,
+                "random_state": random_state,
+                "n_splits": len(splits),
+                "n_merchants": len(merchants),
+                "fold_macro_f1": fold_f1,
+            },
+            f,
+            indent=2,
         )
-        fig, ax = plt.subplots(figsize=(6, 6))
-        disp.plot(ax=ax, cmap="Blues", colorbar=False)
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
-        out_path = "artifacts/metrics/confusion_matrix.png"
-        plt.savefig(out_path, dpi=150)
-        plt.close(fig)
-        print(f"Saved confusion matrix to {out_path}")
-    else:
-        print("No labels in test set match model classes. Skipping confusion matrix.")
 
-    joblib.dump(pipe, "artifacts/checkpoints/merchant_split.joblib")
-    print("Saved model to artifacts/checkpoints/merchant_split.joblib")
+    # every label, not just the first fold model's classes_: in kfold mode a
+    # fold's training split can miss a rare label that another fold tests on
+    classes = np.unique(y)
+    _save_confusion_matrix(
+        y_test, y_pred, classes, os.path.join(run_dir, "confusion_matrix.png")
+    )
+
+    if mode == "shuffle":
+        model_path = os.path.join(run_dir, "model.joblib")
+        joblib.dump(folds[0][0], model_path)
+        print(f"Saved model to {model_path}")
+    return run_dir
 
 
 if __name__ == "__main__":
-    run_merchant_split_eval()
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["shuffle", "kfold"], default="shuffle")
+    parser.add_argument("--n-splits", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+    run_merchant_split_eval(mode=args.mode, n_splits=args.n_splits, n_jobs=args.n_jobs)
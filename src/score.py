@@ -0,0 +1,117 @@
+import os
+import time
+
+import pandas as pd
+
+from src.infer import predict
+from src.ingest import COLUMN_CANDIDATES
+
+CHUNKSIZE = 50_000
+
+
+def _text_column(columns, text_column=None):
+    if text_column:
+        if text_column not in columns:
+            raise ValueError(f"Column '{text_column}' not found in input.")
+        return text_column
+    for c in COLUMN_CANDIDATES["transaction"]:
+        if c in columns:
+            return c
+    raise ValueError(
+        "No text column found; pass text_column (one of "
+        f"{COLUMN_CANDIDATES['transaction']} is detected automatically)."
+    )
+
+
+def _score_chunk(chunk, col, top_k):
+    out = predict(chunk[col].tolist(), top_k=top_k)
+    chunk = chunk.copy()
+    chunk["pred"] = [o["pred"] for o in out]
+    chunk["conf"] = [o["conf"] for o in out]
+    chunk["alias_override"] = [o["alias_override"] for o in out]
+    for k in range(top_k):
+        chunk[f"top{k + 1}_id"] = [
+            o["candidates"][k]["id"] if k < len(o["candidates"]) else None for o in out
+        ]
+        chunk[f"top{k + 1}_prob"] = [
+            o["candidates"][k]["prob"] if k < len(o["candidates"]) else None
+            for o in out
+        ]
+    return chunk
+
+
+def _parquet_schema(input_columns, top_k):
+    import pyarrow as pa
+
+    fields = [pa.field(c, pa.string()) for c in input_columns]
+    fields += [
+        pa.field("pred", pa.string()),
+        pa.field("conf", pa.float64()),
+        pa.field("alias_override", pa.bool_()),
+    ]
+    for k in range(top_k):
+        fields.append(pa.field(f"top{k + 1}_id", pa.string()))
+        fields.append(pa.field(f"top{k + 1}_prob", pa.float64()))
+    return pa.schema(fields)
+
+
+def score_file(input_path, output_path, text_column=None, top_k=3, chunksize=CHUNKSIZE):
+    """
+    Categorize every row of a CSV file.
+
+    The input is streamed in chunks of `chunksize` rows; each chunk is scored
+    with one batch predict() call and appended to `output_path` with pred,
+    conf, alias_override and top-k id/prob columns, so files larger than RAM
+    can be scored. Output is Parquet if `output_path` ends in .parquet,
+    otherwise CSV. Returns the number of rows scored.
+    """
+    parquet = output_path.endswith(".parquet")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp = output_path + ".tmp"
+    total = 0
+    t0 = time.perf_counter()
+    writer = None
+    fh = None
+    col = None
+
+    try:
+        try:
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            else:
+                fh = open(tmp, "w", newline="", encoding="utf8")
+            for chunk in pd.read_csv(input_path, dtype=str, chunksize=chunksize):
+                if col is None:
+                    col = _text_column(chunk.columns, text_column)
+                scored = _score_chunk(chunk, col, top_k)
+                if parquet:
+                    if writer is None:
+                        schema = _parquet_schema(chunk.columns, top_k)
+                        writer = pq.ParquetWriter(tmp, schema)
+                    writer.write_table(
+                        pa.Table.from_pandas(
+                            scored, schema=schema, preserve_index=False
+                        )
+                    )
+                else:
+                    scored.to_csv(fh, index=False, header=total == 0)
+                total += len(scored)
+                elapsed = time.perf_counter() - t0
+                print(f"  scored {total} rows ({total / elapsed:,.0f} rows/s)")
+        finally:
+            if writer is not None:
+                writer.close()
+            if fh is not None:
+                fh.close()
+    except BaseException:
+        # no half-written .tmp left behind next to the output
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, output_path)
+
+    elapsed = time.perf_counter() - t0
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(f"Scored {total} rows -> {output_path} ({rate:,.0f} rows/s)")
+    return total
@@ -0,0 +1,55 @@
+import gc
+
+from src.config import get_section
+
+
+def serve(workers=None, host=None, port=None):
+    """
+    Run the Flask app under gunicorn with `workers` processes.
+
+    The app and model are loaded in the master before forking (preload_app),
+    and gc.freeze() moves them out of the collector's reach, so workers share
+    the model pages copy-on-write instead of each unpickling their own copy.
+    SIGTERM stops accepting connections and lets in-flight requests finish
+    within graceful_timeout.
+
+    Each worker runs `threads` requests at once and accepts at most
+    max_concurrency connections (gunicorn's worker_connections), queueing
+    the rest internally; further connections wait in the listen `backlog`.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("Serve mode requires gunicorn: pip install gunicorn")
+
+    cfg = get_section("server")
+    options = {
+        "bind": f"{host or cfg.get('host', '127.0.0.1')}:{port or cfg.get('port', 8787)}",
+        "workers": int(workers or cfg.get("workers", 2)),
+        "worker_class": "gthread",
+        "threads": int(cfg.get("threads", 4)),
+        "worker_connections": int(cfg.get("max_concurrency", 32)),
+        "backlog": int(cfg.get("backlog", 2048)),
+        "preload_app": True,
+        "timeout": int(cfg.get("timeout", 60)),
+        "graceful_timeout": int(cfg.get("graceful_timeout", 30)),
+        "accesslog": "-",
+    }
+
+    class _Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from src.app import app, warmup
+
+            warmup()
+            gc.freeze()
+            return app
+
+    print(
+        f"Serving on http://{options['bind']} with {options['workers']} workers "
+        f"(readiness: /readyz)"
+    )
+    _Server().run()
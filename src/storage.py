@@ -0,0 +1,397 @@
+import os
+import shutil
+import sys
+import time
+import warnings
+from glob import escape, glob
+
+import pandas as pd
+
+from src.config import get_section
+
+_cfg = get_section("storage")
+# Datasets are addressed by a logical path without extension, e.g.
+# "data/processed/processed"; FORMAT decides whether that is stored as a
+# directory of Parquet part files (processed.parquet/) or as one CSV file
+# (processed.csv). An explicit .csv/.parquet extension always wins.
+FORMAT = _cfg.get("format", "parquet")
+FORMATS = ("parquet", "csv")
+COMPRESSION = _cfg.get("compression", "zstd")
+ROWS_PER_FILE = int(_cfg.get("rows_per_file", 1_000_000))
+ROW_GROUP_SIZE = int(_cfg.get("row_group_size", 100_000))
+# heavily repeated columns, stored dictionary-encoded
+DICTIONARY_COLUMNS = list(_cfg.get("dictionary_columns", ["label", "merchant"]))
+BATCH_SIZE = 100_000
+# CSV cells are read as strings, and only empty cells are missing: normalized
+# texts such as "null", "nan" or "n/a" must not turn into NaN
+CSV_OPTIONS = {"dtype": str, "keep_default_na": False, "na_values": [""]}
+
+
+def _candidates(path):
+    ext = os.path.splitext(path)[1]
+    if ext in (".csv", ".parquet"):
+        return [(path, ext[1:])]
+    if os.path.isdir(path):
+        # a directory of Parquet shards written by another tool
+        return [(path, "parquet")]
+    order = [FORMAT] + [f for f in FORMATS if f != FORMAT]
+    return [(f"{path}.{fmt}", fmt) for fmt in order]
+
+
+def target(path, format=None):
+    """(on-disk path, format) a write to logical `path` goes to."""
+    ext = os.path.splitext(path)[1]
+    if ext in (".csv", ".parquet"):
+        return path, ext[1:]
+    fmt = format or FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format '{fmt}', expected parquet or csv")
+    return f"{path}.{fmt}", fmt
+
+
+_warned = set()
+
+
+def _caller_stacklevel():
+    """warnings stacklevel of the first frame outside this module."""
+    frame, level = sys._getframe(1), 1
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame, level = frame.f_back, level + 1
+    return level
+
+
+def _present(p):
+    """Whether `p` exists, waiting out a replace() that has moved it aside."""
+    for _ in range(100):
+        if os.path.exists(p):
+            return True
+        if not glob(escape(p) + ".old-*"):
+            return False
+        time.sleep(0.01)
+    return os.path.exists(p)
+
+
+def locate(path):
+    """
+    (on-disk path, format) of an existing dataset. The configured format is
+    preferred; the other one is read for compatibility if it is all there is.
+    """
+    found = [(p, fmt) for p, fmt in _candidates(path) if _present(p)]
+    if not found:
+        raise FileNotFoundError(f"No dataset at {path} (.parquet or .csv)")
+    if len(found) > 1 and path not in _warned:
+        # once per dataset, attributed to the code that asked for it
+        _warned.add(path)
+        warnings.warn(
+            f"Both {found[0][0]} and {found[1][0]} exist; reading {found[0][0]} "
+            "(storage.format). Remove the other if it is stale.",
+            stacklevel=_caller_stacklevel(),
+        )
+    return found[0]
+
+
+def exists(path):
+    return any(os.path.exists(p) for p, _ in _candidates(path))
+
+
+# --- reading -----------------------------------------------------------------
+
+
+def _parquet_dataset(path):
+    import pyarrow.dataset as ds
+
+    if os.path.isdir(path):
+        files = sorted(glob(os.path.join(path, "**", "*.parquet"), recursive=True))
+        # hive-style key=value directories become columns
+        return ds.dataset(
+            files, format="parquet", partitioning="hive", partition_base_dir=path
+        )
+    return ds.dataset(path, format="parquet")
+
+
+def _decode_dictionaries(table):
+    """Plain columns for pandas (dictionary encoding is a storage detail)."""
+    import pyarrow as pa
+
+    fields = [
+        pa.field(f.name, f.type.value_type) if pa.types.is_dictionary(f.type) else f
+        for f in table.schema
+    ]
+    return table.cast(pa.schema(fields))
+
+
+def _filter_frame(df, filters):
+    """Apply DNF `filters` (as pyarrow.parquet's filters argument) to a frame."""
+    ops = {
+        "=": lambda s, v: s == v,
+        "==": lambda s, v: s == v,
+        "!=": lambda s, v: s != v,
+        "<": lambda s, v: s < v,
+        "<=": lambda s, v: s <= v,
+        ">": lambda s, v: s > v,
+        ">=": lambda s, v: s >= v,
+        "in": lambda s, v: s.isin(list(v)),
+        "not in": lambda s, v: ~s.isin(list(v)),
+    }
+    groups = filters if isinstance(filters[0], list) else [filters]
+    keep = pd.Series(False, index=df.index)
+    for group in groups:
+        mask = pd.Series(True, index=df.index)
+        for col, op, value in group:
+            mask &= ops[op](df[col], value)
+        keep |= mask
+    return df[keep]
+
+
+def _raw_batches(path, columns, filters, batch_size):
+    on_disk, fmt = locate(path)
+    if fmt == "csv":
+        # CSV has no pushdown: filter columns need reading before projection
+        needed = None
+        if columns is not None:
+            needed = list(columns)
+            groups = filters if filters and isinstance(filters[0], list) else [filters]
+            for group in groups if filters else []:
+                needed += [c for c, _, _ in group if c not in needed]
+        for chunk in pd.read_csv(
+            on_disk, usecols=needed, chunksize=batch_size, **CSV_OPTIONS
+        ):
+            if filters:
+                chunk = _filter_frame(chunk, filters)
+            yield chunk[list(columns)] if columns is not None else chunk
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    scanner = _parquet_dataset(on_disk).scanner(
+        columns=list(columns) if columns is not None else None,
+        filter=pq.filters_to_expression(filters) if filters else None,
+        batch_size=batch_size,
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield _decode_dictionaries(pa.Table.from_batches([batch])).to_pandas()
+
+
+def iter_batches(path, columns=None, filters=None, batch_size=BATCH_SIZE):
+    """
+    Stream the dataset at logical `path` as DataFrames of exactly
+    `batch_size` rows (the last may be shorter), in storage order.
+
+    columns: only these columns are read (projection).
+    filters: DNF predicates in pyarrow.parquet form, e.g.
+        [("label", "=", "fuel")] or [[("label", "in", ["fuel", "dining"])]].
+        Parquet pushes them down to skip row groups and partitions; CSV
+        applies them per chunk.
+    """
+    pending, size = [], 0
+    for chunk in _raw_batches(path, columns, filters, batch_size):
+        pending.append(chunk)
+        size += len(chunk)
+        while size >= batch_size:
+            merged = pd.concat(pending, ignore_index=True)
+            yield merged.iloc[:batch_size].reset_index(drop=True)
+            rest = merged.iloc[batch_size:]
+            pending, size = ([rest] if len(rest) else []), len(rest)
+    if size:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def read_table(path, columns=None, filters=None):
+    """The dataset at logical `path` as one DataFrame (see iter_batches)."""
+    on_disk, fmt = locate(path)
+    if fmt == "csv":
+        return (
+            pd.concat(iter_batches(path, columns, filters), ignore_index=True)
+            if filters
+            else pd.read_csv(on_disk, usecols=columns, **CSV_OPTIONS)
+        )
+    import pyarrow.parquet as pq
+
+    table = _parquet_dataset(on_disk).to_table(
+        columns=list(columns) if columns is not None else None,
+        filter=pq.filters_to_expression(filters) if filters else None,
+    )
+    return _decode_dictionaries(table).to_pandas()
+
+
+# --- writing -----------------------------------------------------------------
+
+
+class PartWriter:
+    """
+    Writes DataFrames into Parquet part files `<prefix>-00000.parquet`, ...
+    under `directory`, starting a new file every `rows_per_file` rows.
+    Readers take part files in sorted path order, so row order is kept.
+    """
+
+    def __init__(
+        self, directory, prefix="part", rows_per_file=ROWS_PER_FILE, schema=None
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.rows_per_file = rows_per_file
+        # fixed up front when several writers must produce one dataset
+        self.schema = schema
+        self._writer = None
+        self._rows_in_file = 0
+        self._files = 0
+
+    def _schema_for(self, df):
+        import pyarrow as pa
+
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        # all-null first chunks would otherwise pin a column to the null type
+        return pa.schema(
+            [
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                for f in schema
+            ]
+        )
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.directory, f"{self.prefix}-{self._files:05d}.parquet")
+        self._files += 1
+        self._rows_in_file = 0
+        self._writer = pq.ParquetWriter(
+            path,
+            self.schema,
+            compression=COMPRESSION,
+            use_dictionary=[c for c in DICTIONARY_COLUMNS if c in self.schema.names],
+        )
+
+    def write(self, df):
+        import pyarrow as pa
+
+        if self.schema is None:
+            self.schema = self._schema_for(df)
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        offset = 0
+        while offset < table.num_rows:
+            if self._writer is None or self._rows_in_file >= self.rows_per_file:
+                self.close()
+                self._open()
+            n = min(self.rows_per_file - self._rows_in_file, table.num_rows - offset)
+            self._writer.write_table(
+                table.slice(offset, n), row_group_size=ROW_GROUP_SIZE
+            )
+            self._rows_in_file += n
+            offset += n
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def finish(self):
+        """Close, writing an empty part if no rows arrived so the schema survives."""
+        if self._files == 0 and self.schema is not None:
+            self._open()
+        self.close()
+
+
+class TableWriter:
+    """
+    Streaming writer for the dataset at logical `path`: call write(df) once
+    per chunk. Output goes to a temporary path and replaces the old dataset
+    on close (see replace()), so readers never see a partial write.
+    """
+
+    def __init__(self, path, format=None, rows_per_file=ROWS_PER_FILE):
+        self.path, self.format = target(path, format)
+        self._tmp = f"{self.path}.tmp-{os.getpid()}"
+        self._rows_per_file = rows_per_file
+        self.rows = 0
+
+    def __enter__(self):
+        parent = os.path.dirname(self.path) or "."
+        os.makedirs(parent, exist_ok=True)
+        remove(self._tmp)
+        if self.format == "parquet":
+            os.makedirs(self._tmp)
+            self._parts = PartWriter(self._tmp, rows_per_file=self._rows_per_file)
+        else:
+            self._header = True
+        return self
+
+    def write(self, df):
+        if self.format == "parquet":
+            self._parts.write(df)
+        else:
+            df.to_csv(
+                self._tmp,
+                mode="w" if self._header else "a",
+                header=self._header,
+                index=False,
+            )
+            self._header = False
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.format == "parquet":
+            self._parts.finish()
+        if exc_type is not None:
+            remove(self._tmp)
+            return False
+        replace(self._tmp, self.path)
+        return False
+
+
+def remove(path):
+    """Delete a dataset (Parquet directory or single file) if present."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def replace(tmp, path):
+    """
+    Swap the finished dataset at `tmp` in for `path`. A file is replaced
+    atomically. A directory cannot replace a non-empty one, so the old
+    dataset is renamed aside first (locate() waits while it is) and
+    deleted once the new one is in place.
+    """
+    old = None
+    if os.path.isdir(path) or (os.path.exists(path) and os.path.isdir(tmp)):
+        old = f"{path}.old-{os.getpid()}"
+        remove(old)
+        os.replace(path, old)
+    os.replace(tmp, path)
+    if old is not None:
+        remove(old)
+
+
+def write_table(df, path, partition_by=None, format=None):
+    """
+    Write `df` as the dataset at logical `path`; returns the on-disk path.
+
+    partition_by: Parquet only; rows are split into hive-style
+    column=value/ directories (in sorted key order, preserving row order
+    within each partition), which read_table/iter_batches restore as columns
+    and can prune with filters.
+    """
+    on_disk, fmt = target(path, format)
+    if fmt == "csv" or not partition_by:
+        with TableWriter(path, format) as w:
+            w.write(df)
+        return on_disk
+
+    tmp = f"{on_disk}.tmp-{os.getpid()}"
+    remove(tmp)
+    try:
+        for key, part in df.groupby(partition_by, sort=True, dropna=False):
+            key = key if isinstance(key, tuple) else (key,)
+            subdir = os.path.join(tmp, *(f"{c}={v}" for c, v in zip(partition_by, key)))
+            os.makedirs(subdir)
+            parts = PartWriter(subdir)
+            parts.write(part.drop(columns=partition_by))
+            parts.finish()
+    except BaseException:
+        remove(tmp)
+        raise
+    replace(tmp, on_disk)
+    return on_disk
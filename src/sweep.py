@@ -0,0 +1,190 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+from src import feature_store, storage
+from src.config import get_section
+from src.features import build_vectorizer, vectorizer_params
+
+VECTORIZER_PARAMS = (
+    "vectorizer",
+    "analyzer",
+    "ngram_range",
+    "max_features",
+    "min_df",
+    "n_features",
+    "sublinear_tf",
+)
+CLASSIFIER_PARAMS = ("C", "class_weight", "max_iter")
+
+DEFAULT_SPACE = {
+    "max_features": [2000, 5000, 10000],
+    "ngram_range": [[1, 2], [1, 3]],
+    "C": [0.3, 1.0, 3.0],
+    "class_weight": ["balanced", None],
+}
+
+
+def _expand(space, search, n_iter, random_state):
+    """List of trial param dicts for a grid or random search over `space`."""
+    if search == "random":
+        return list(ParameterSampler(space, n_iter=n_iter, random_state=random_state))
+    keys = sorted(space)
+    return [
+        dict(zip(keys, values))
+        for values in itertools.product(*(space[k] for k in keys))
+    ]
+
+
+def _split(params):
+    vec = {}
+    clf = {"C": 1.0, "class_weight": "balanced", "max_iter": 1000}
+    for k, v in params.items():
+        if k in VECTORIZER_PARAMS:
+            vec[k] = v
+        elif k in CLASSIFIER_PARAMS:
+            clf[k] = v
+        else:
+            raise ValueError(f"Unknown sweep parameter '{k}'")
+    # unswept vectorizer settings come from the `features` config section;
+    # trials already run in parallel, so each vectorizer runs single-process
+    return dict(vectorizer_params(vec), n_jobs=1), clf
+
+
+def _key(*parts):
+    return hashlib.sha1(
+        json.dumps(parts, sort_keys=True, default=str).encode("utf8")
+    ).hexdigest()[:16]
+
+
+def _run_task(vec_params, clf_trials, fold, X, y, train_idx, test_idx, scoring, seed):
+    """
+    One (vectorizer config, fold) task: build the fold's features once and
+    fit every classifier config that shares them.
+    """
+    vec, Xv_train = feature_store.fit_transform(
+        build_vectorizer(vec_params), [X[i] for i in train_idx]
+    )
+    Xv_test = feature_store.transform(vec, [X[i] for i in test_idx])
+    scorer = get_scorer(scoring)
+    out = []
+    for trial_id, clf_params in clf_trials:
+        t0 = time.perf_counter()
+        clf = LogisticRegression(random_state=seed, **clf_params)
+        clf.fit(Xv_train, y[train_idx])
+        score = scorer(clf, Xv_test, y[test_idx])
+        out.append((trial_id, fold, float(score), time.perf_counter() - t0))
+    return out
+
+
+def run_sweep(processed_csv="data/processed/processed", cfg=None):
+    """
+    Cross-validated hyperparameter search configured by the `sweep` section of
+    configs/config.yaml. Fold scores are written to trials_dir as they finish,
+    so an interrupted sweep resumes where it stopped; a ranked JSON report is
+    written at the end.
+    """
+    cfg = cfg if cfg is not None else get_section("sweep")
+    space = cfg.get("space") or DEFAULT_SPACE
+    n_splits = int(cfg.get("n_splits", 5))
+    seed = int(cfg.get("random_state", 42))
+    scoring = cfg.get("scoring", "f1_macro")
+    trials_dir = cfg.get("trials_dir", "artifacts/sweeps/trials")
+    report_path = cfg.get("report", "artifacts/sweeps/report.json")
+    os.makedirs(trials_dir, exist_ok=True)
+
+    df = storage.read_table(processed_csv, columns=["text", "label"]).dropna(
+        subset=["label"]
+    )
+    X = df["text"].fillna("").astype(str).tolist()
+    y = df["label"].astype(str).to_numpy()
+    folds = list(
+        StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y)
+    )
+    data_key = _key(feature_store.texts_digest(X), y.tolist(), n_splits, seed, scoring)
+
+    trials = {}
+    for params in _expand(
+        space, cfg.get("search", "grid"), int(cfg.get("n_iter", 20)), seed
+    ):
+        vec_params, clf_params = _split(params)
+        trials[_key(data_key, vec_params, clf_params)] = (
+            params,
+            vec_params,
+            clf_params,
+        )
+
+    def fold_path(trial_id, fold):
+        return os.path.join(trials_dir, f"{trial_id}.fold{fold}.json")
+
+    tasks = {}
+    for trial_id, (_, vec_params, clf_params) in trials.items():
+        for fold in range(n_splits):
+            if not os.path.exists(fold_path(trial_id, fold)):
+                tasks.setdefault((_key(vec_params), fold), (vec_params, []))[1].append(
+                    (trial_id, clf_params)
+                )
+    done = len(trials) * n_splits - sum(len(t[1]) for t in tasks.values())
+    print(
+        f"Sweep: {len(trials)} trials x {n_splits} folds "
+        f"({done} fold results cached, {len(tasks)} tasks to run)"
+    )
+
+    results = Parallel(
+        n_jobs=int(cfg.get("n_jobs", -1)), return_as="generator_unordered"
+    )(
+        delayed(_run_task)(
+            vec_params, clf_trials, fold, X, y, *folds[fold], scoring, seed
+        )
+        for (_, fold), (vec_params, clf_trials) in tasks.items()
+    )
+    for task_result in results:
+        for trial_id, fold, score, seconds in task_result:
+            tmp = fold_path(trial_id, fold) + ".tmp"
+            with open(tmp, "w", encoding="utf8") as f:
+                json.dump({"score": score, "fit_seconds": seconds}, f)
+            os.replace(tmp, fold_path(trial_id, fold))
+
+    ranked = []
+    for trial_id, (params, _, _) in trials.items():
+        folds_out = []
+        for fold in range(n_splits):
+            with open(fold_path(trial_id, fold), "r", encoding="utf8") as f:
+                folds_out.append(json.load(f))
+        scores = np.array([r["score"] for r in folds_out])
+        ranked.append(
+            {
+                "trial_id": trial_id,
+                "params": params,
+                "mean": float(scores.mean()),
+                "std": float(scores.std()),
+                "scores": scores.tolist(),
+                "fit_seconds": float(sum(r["fit_seconds"] for r in folds_out)),
+            }
+        )
+    ranked.sort(key=lambda r: (-r["mean"], r["std"]))
+    for rank, r in enumerate(ranked, start=1):
+        r["rank"] = rank
+
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf8") as f:
+        json.dump(
+            {"scoring": scoring, "n_splits": n_splits, "trials": ranked}, f, indent=2
+        )
+    print(f"Top trials by mean {scoring}:")
+    for r in ranked[:5]:
+        print(f"  #{r['rank']} {r['mean']:.4f} ± {r['std']:.4f}  {r['params']}")
+    print(f"Saved sweep report to {report_path}")
+    return ranked
+
+
+if __name__ == "__main__":
+    run_sweep()
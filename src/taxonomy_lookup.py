@@ -1,13 +1,23 @@
 import yaml
 import re
+from collections import deque
 from functools import lru_cache
 
+from src.prediction_cache import file_fingerprint
 
-@lru_cache()
-def load_taxonomy(path="configs/taxonomy.yaml"):
+TAXONOMY_PATH = "configs/taxonomy.yaml"
+
+
+def load_taxonomy(path=TAXONOMY_PATH):
     """
-    Returns list of category dicts with keys: id, display_name, aliases_norm
+    Returns list of category dicts with keys: id, display_name, aliases_norm.
+    Reloaded when the taxonomy file changes.
     """
+    return _load_taxonomy(path, file_fingerprint(path))
+
+
+@lru_cache(maxsize=8)
+def _load_taxonomy(path, version):
     with open(path, "r", encoding="utf8") as f:
         raw = yaml.safe_load(f)
     cats = raw.get("categories") or []
@@ -25,6 +35,121 @@ def get_all_categories():
     return [(c["id"], c["display_name"]) for c in cats]
 
 
+class AliasMatcher:
+    """
+    Precompiled alias matcher for a loaded taxonomy.
+
+    Token matches are resolved through a hash index of aliases; substring
+    matches through an Aho-Corasick automaton over all aliases, so a lookup
+    costs O(len(text)) regardless of how many aliases the taxonomy holds.
+    Ties are broken by (category order, alias order), exactly like scanning
+    the taxonomy top to bottom.
+    """
+
+    def __init__(self, cats):
+        self._token_index = {}
+        patterns = []
+        for ci, c in enumerate(cats):
+            for ai, a in enumerate(c["aliases_norm"]):
+                if not a:
+                    continue
+                prio = (ci, ai)
+                if a not in self._token_index:
+                    self._token_index[a] = (prio, c["id"], a)
+                patterns.append((a, prio, c["id"]))
+        self._build_automaton(patterns)
+
+    def _build_automaton(self, patterns):
+        goto = [{}]
+        out = [None]
+        for alias, prio, cid in patterns:
+            state = 0
+            for ch in alias:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(None)
+                state = nxt
+            if out[state] is None or prio < out[state][0]:
+                out[state] = (prio, cid, alias)
+
+        # Breadth-first pass: fail links, and fold the best output reachable
+        # through the fail chain into each state.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                inherited = out[fail[nxt]]
+                if inherited is not None and (
+                    out[nxt] is None or inherited[0] < out[nxt][0]
+                ):
+                    out[nxt] = inherited
+                queue.append(nxt)
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def _substring_match(self, text_l):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        best = None
+        for ch in text_l:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = out[state]
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        return best
+
+    def lookup(self, text):
+        if not isinstance(text, str):
+            return None, None, None
+        text_l = text.lower()
+        if not text_l:
+            return None, None, None
+
+        best = None
+        for tok in re.split(r"\W+", text_l):
+            hit = self._token_index.get(tok)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        if best is not None:
+            return best[1], "token", best[2]
+
+        hit = self._substring_match(text_l)
+        if hit is not None:
+            return hit[1], "substring", hit[2]
+        return None, None, None
+
+    def lookup_many(self, texts):
+        seen = {}
+        res = []
+        for t in texts:
+            key = t if isinstance(t, str) else None
+            if key not in seen:
+                seen[key] = self.lookup(key)
+            res.append(seen[key])
+        return res
+
+
+def get_alias_matcher(path=TAXONOMY_PATH):
+    """The compiled alias matcher, rebuilt when the taxonomy file changes."""
+    return _alias_matcher(path, file_fingerprint(path))
+
+
+@lru_cache(maxsize=8)
+def _alias_matcher(path, version):
+    return AliasMatcher(_load_taxonomy(path, version))
+
+
 def alias_lookup(text):
     """
     Checks the taxonomy aliases and returns a tuple:
@@ -33,19 +158,12 @@ def alias_lookup(text):
     matched_alias: the alias text that matched (lowercase)
     Returns (None, None, None) if no match.
     """
-    text_l = (text or "").lower()
-    if not text_l:
-        return None, None, None
+    return get_alias_matcher().lookup(text)
 
-    tokens = re.split(r"\W+", text_l)
-    cats = load_taxonomy()
-    for c in cats:
-        for a in c["aliases_norm"]:
-            if a and a in tokens:
-                return c["id"], "token", a
-    for c in cats:
-        for a in c["aliases_norm"]:
-            if a and a in text_l:
-                return c["id"], "substring", a
 
-    return None, None, None
+def alias_lookup_many(texts):
+    """
+    Batch version of alias_lookup: returns one (category_id, method,
+    matched_alias) tuple per input text, in input order.
+    """
+    return get_alias_matcher().lookup_many(texts)
@@ -1,37 +1,256 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import make_pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report, confusion_matrix
-import joblib
+import json
+import numpy as np
 import os
+import sys
+import time
+from src import feature_store, storage
+from src.config import get_section
+from src.features import build_vectorizer
+from src.export_model import save_model
 from src.preprocess import load_and_process
 
+# held-out rows are featurized and scored in chunks of this size, both here
+# and in evaluate(), so the chunks cached by train() are the ones it reuses
+HOLDOUT_CHUNKSIZE = 50_000
+
+
+def holdout_path(model_out):
+    """
+    The dataset (a src.storage path) holding the held-out split for the
+    model at `model_out`.
+    """
+    return os.path.splitext(model_out)[0] + ".holdout"
+
+
+def split_dataset(df):
+    """The deterministic train/test split used by train()."""
+    df = df.dropna(subset=["label"])
+    df["text"] = df["text"].fillna("")
+    return train_test_split(
+        df["text"], df["label"], test_size=0.2, random_state=42, stratify=df["label"]
+    )
+
 
 def train(
-    path="data/processed/processed.csv",
+    path=None,
     model_out="artifacts/checkpoints/baseline.joblib",
 ):
-    df = load_and_process()
-    X = df["text"]
-    y = df["label"]
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    pipe = make_pipeline(
-        TfidfVectorizer(ngram_range=(1, 2), max_features=5000, analyzer="char_wb"),
-        LogisticRegression(max_iter=1000, class_weight="balanced", random_state=42),
-    )
-    pipe.fit(X_train, y_train)
-    y_pred = pipe.predict(X_test)
+    """
+    Fit the TF-IDF + LogisticRegression baseline. `path` is a dataset with
+    text,label columns (see src.storage); by default the raw data is
+    preprocessed first. The held-out split is saved next to the model for
+    evaluate().
+    """
+    df = (
+        load_and_process()
+        if path is None
+        else storage.read_table(path, columns=["text", "label"])
+    )
+    X_train, X_test, y_train, y_test = split_dataset(df)
+    vec, Xv_train = feature_store.fit_transform(
+        build_vectorizer(),
+        X_train,
+    )
+    clf = LogisticRegression(max_iter=1000, class_weight="balanced", random_state=42)
+    clf.fit(Xv_train, y_train)
+    pipe = make_pipeline(vec, clf)
+    y_pred = np.concatenate(
+        [
+            clf.predict(
+                feature_store.transform(vec, X_test.iloc[i : i + HOLDOUT_CHUNKSIZE])
+            )
+            for i in range(0, len(X_test), HOLDOUT_CHUNKSIZE)
+        ]
+    )
     print(classification_report(y_test, y_pred, digits=4))
     cm = confusion_matrix(y_test, y_pred, labels=pipe.classes_)
     os.makedirs(os.path.dirname(model_out), exist_ok=True)
-    joblib.dump(pipe, model_out)
+    export_dir = save_model(pipe, model_out)
     print("Saved model to", model_out)
+    print("Exported NumPy weights to", export_dir)
+    holdout = storage.write_table(
+        pd.DataFrame({"text": X_test, "label": y_test}), holdout_path(model_out)
+    )
+    print("Saved held-out split to", holdout)
     return pipe, X_test, y_test
 
 
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _clean_chunk(chunk):
+    chunk = chunk.dropna(subset=["label"])
+    return chunk["text"].fillna("").astype(str), chunk["label"].astype(str)
+
+
+def _holdout_mask(labels, seen, every):
+    """
+    Deterministic stratified split of a stream: every `every`-th row of each
+    label is held out. `seen` carries per-label row counts across chunks.
+    """
+    position = labels.groupby(labels).cumcount().to_numpy() + labels.map(seen).fillna(
+        0
+    ).to_numpy(dtype=np.int64)
+    for label, count in labels.value_counts().items():
+        seen[label] = seen.get(label, 0) + int(count)
+    return position % every == every - 1
+
+
+def _validate(vec, clf, path, chunksize, class_index):
+    """Confusion matrix of `clf` over the held-out dataset, scored chunk by chunk."""
+    cm = np.zeros((len(class_index), len(class_index)), dtype=np.int64)
+    for chunk in storage.iter_batches(path, ["text", "label"], batch_size=chunksize):
+        texts, labels = _clean_chunk(chunk)
+        if texts.empty:
+            continue
+        pred = clf.predict(vec.transform(texts))
+        np.add.at(
+            cm,
+            (
+                labels.map(class_index).to_numpy(),
+                pd.Series(pred).map(class_index).to_numpy(),
+            ),
+            1,
+        )
+    return cm
+
+
+def _scores(cm):
+    """Accuracy and macro F1 from a confusion matrix (rows = true labels);
+    macro F1 averages over the labels present in the held-out rows."""
+    tp = np.diag(cm).astype(float)
+    support = cm.sum(axis=1)
+    denom = cm.sum(axis=0) + support
+    f1 = np.divide(2 * tp, denom, out=np.zeros_like(tp), where=denom > 0)
+    present = support > 0
+    macro_f1 = float(f1[present].mean()) if present.any() else 0.0
+    return float(tp.sum() / max(cm.sum(), 1)), macro_f1
+
+
+def train_out_of_core(
+    path="data/processed/processed",
+    model_out=None,
+    epochs=None,
+    chunksize=None,
+):
+    """
+    Train a hashing TF-IDF + SGDClassifier(log_loss) model by streaming
+    the dataset at `path` (see src.storage) in chunks, so it never has to
+    fit in memory; memory is bounded by chunksize and n_features.
+
+    A first pass learns the class set and IDF weights (train rows only) and
+    writes a stratified held-out stream to holdout_path(model_out), the same
+    file evaluate() reads. Each epoch then partial_fits every training chunk
+    (rows shuffled within the chunk) and is validated on the held-out stream.
+    Rows should not be sorted by label, since shuffling is chunk-local.
+    Reports rows/sec and peak RSS; returns the run's metrics dict.
+    """
+    cfg = get_section("out_of_core")
+    model_out = model_out or cfg.get(
+        "model_out", "artifacts/checkpoints/out_of_core.joblib"
+    )
+    epochs = int(epochs or cfg.get("epochs", 5))
+    chunksize = int(chunksize or cfg.get("chunksize", 50_000))
+    every = int(cfg.get("holdout_every", 10))
+    vec = build_vectorizer({"vectorizer": "hashing", "n_jobs": 1})
+    clf = SGDClassifier(
+        loss="log_loss", alpha=float(cfg.get("alpha", 1e-5)), random_state=42
+    )
+    os.makedirs(os.path.dirname(model_out) or ".", exist_ok=True)
+    holdout = holdout_path(model_out)
+
+    t0 = time.perf_counter()
+    seen, labels_seen, n_train, n_holdout = {}, set(), 0, 0
+    with storage.TableWriter(holdout) as held_out:
+        for chunk in storage.iter_batches(
+            path, ["text", "label"], batch_size=chunksize
+        ):
+            texts, labels = _clean_chunk(chunk)
+            held = _holdout_mask(labels, seen, every)
+            labels_seen.update(labels.unique())
+            if (~held).any():
+                vec.partial_fit(texts[~held])
+            held_out.write(pd.DataFrame({"text": texts[held], "label": labels[held]}))
+            n_train += int((~held).sum())
+            n_holdout += int(held.sum())
+    classes = np.array(sorted(labels_seen))
+    class_index = {c: i for i, c in enumerate(classes)}
+    print(
+        f"Stats pass: {n_train} train / {n_holdout} held-out rows, "
+        f"{len(classes)} classes in {time.perf_counter() - t0:.2f}s"
+    )
+
+    history = []
+    for epoch in range(epochs):
+        rng = np.random.default_rng(epoch)
+        seen = {}
+        te = time.perf_counter()
+        for chunk in storage.iter_batches(
+            path, ["text", "label"], batch_size=chunksize
+        ):
+            texts, labels = _clean_chunk(chunk)
+            train_rows = ~_holdout_mask(labels, seen, every)
+            if not train_rows.any():
+                continue
+            X = vec.transform(texts[train_rows])
+            y = labels[train_rows].to_numpy()
+            order = rng.permutation(X.shape[0])
+            clf.partial_fit(X[order], y[order], classes=classes)
+        seconds = time.perf_counter() - te
+        accuracy, macro_f1 = _scores(
+            _validate(vec, clf, holdout, chunksize, class_index)
+        )
+        history.append(
+            {
+                "epoch": epoch + 1,
+                "seconds": seconds,
+                "rows_per_sec": n_train / seconds if seconds else None,
+                "val_accuracy": accuracy,
+                "val_macro_f1": macro_f1,
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+        )
+        print(
+            f"Epoch {epoch + 1}/{epochs}: {n_train / seconds:,.0f} rows/s, "
+            f"val accuracy {accuracy:.4f}, val macro F1 {macro_f1:.4f}, "
+            f"peak RSS {history[-1]['peak_rss_mb'] or float('nan'):.0f} MB"
+        )
+
+    pipe = make_pipeline(vec, clf)
+    export_dir = save_model(pipe, model_out)
+    print("Saved model to", model_out)
+    print("Exported NumPy weights to", export_dir)
+    total = time.perf_counter() - t0
+    metrics = {
+        "path": path,
+        "train_rows": n_train,
+        "holdout_rows": n_holdout,
+        "epochs": epochs,
+        "chunksize": chunksize,
+        "seconds": total,
+        "rows_per_sec": n_train * epochs / total,
+        "peak_rss_mb": _peak_rss_mb(),
+        "history": history,
+    }
+    with open(
+        os.path.splitext(model_out)[0] + ".metrics.json", "w", encoding="utf8"
+    ) as f:
+        json.dump(metrics, f, indent=2)
+    return metrics
+
+
 if __name__ == "__main__":
     train()
@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from src.batcher import MicroBatcher
+
+
+def _echo(texts, top_k=5):
+    return [{"pred": t, "top_k": top_k} for t in texts]
+
+
+def test_lone_request_is_dispatched_without_waiting():
+    batcher = MicroBatcher(_echo, max_wait_ms=60_000)
+    assert batcher.predict("coffee", top_k=3, timeout=5) == {
+        "pred": "coffee",
+        "top_k": 3,
+    }
+    assert batcher.stats()["batch_size_histogram"] == {1: 1}
+
+
+def test_queued_requests_share_one_call():
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def predict_fn(texts, top_k=5):
+        entered.set()
+        release.wait(5)
+        calls.append(list(texts))
+        return _echo(texts, top_k)
+
+    batcher = MicroBatcher(predict_fn, max_wait_ms=50)
+    head = batcher.submit("head")
+    assert entered.wait(5)
+    # queued while the first call is still running
+    futs = [batcher.submit(f"t{i}") for i in range(4)]
+    release.set()
+    assert head.result(5)["pred"] == "head"
+    assert [f.result(5)["pred"] for f in futs] == ["t0", "t1", "t2", "t3"]
+    assert calls == [["head"], ["t0", "t1", "t2", "t3"]]
+
+
+def test_short_result_list_fails_every_caller():
+    batcher = MicroBatcher(lambda texts, top_k=5: [], max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="0 results for 1 texts"):
+        batcher.predict("rent", timeout=5)
+
+
+def test_error_outside_predict_fn_does_not_kill_the_thread():
+    batcher = MicroBatcher(_echo, max_wait_ms=1)
+    batcher.batch_sizes = None  # breaks the stats update in _process
+    with pytest.raises(TypeError):
+        batcher.predict("rent", timeout=5)
+    assert batcher._thread.is_alive()
+
+
+def test_timeout_cancels_the_request():
+    release = threading.Event()
+
+    def predict_fn(texts, top_k=5):
+        release.wait(5)
+        return _echo(texts, top_k)
+
+    batcher = MicroBatcher(predict_fn, max_wait_ms=1)
+    slow = batcher.submit("slow")
+    with pytest.raises(TimeoutError):
+        batcher.predict("late", timeout=0.05)
+    release.set()
+    assert slow.result(5)["pred"] == "slow"
+    assert batcher.predict("next", timeout=5)["pred"] == "next"
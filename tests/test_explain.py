@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.utils import murmurhash3_32
+
+from src.explain import _hashed_feature_names, _sparse_contributions
+from src.model_registry import LoadedModel
+
+TEXTS = ["starbucks coffee", "shell petrol", "coffee beans", "petrol station"]
+LABELS = ["dining", "fuel", "dining", "fuel"]
+
+
+def test_binary_contributions_point_towards_the_predicted_class():
+    pipe = make_pipeline(TfidfVectorizer(), LogisticRegression()).fit(TEXTS, LABELS)
+    loaded = LoadedModel("model.joblib", pipe, "v1")
+    Xv = loaded.vectorizer.transform(TEXTS).tocsr()
+    class_idx = np.array([0, 1, 0, 1])
+
+    out = _sparse_contributions(
+        Xv, loaded.classifier.coef_, class_idx, loaded, TEXTS, top_n=2
+    )
+    assert all(score > 0 for row in out for _, score in row)
+    assert dict(out[1])["petrol"] > 0 and dict(out[0])["coffee"] > 0
+
+
+def test_hashed_feature_names_match_sklearn_hashing():
+    vec = HashingVectorizer(ngram_range=(1, 2), n_features=2**10)
+    text = "starbucks coffee starbucks"
+    expected = {
+        abs(murmurhash3_32(g, seed=0)) % vec.n_features: g
+        for g in vec.build_analyzer()(text)
+    }
+    assert _hashed_feature_names(vec, text) == expected
+    assert _hashed_feature_names(vec, "") == {}
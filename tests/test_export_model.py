@@ -0,0 +1,51 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import make_pipeline
+
+from src import storage
+from src.export_model import export_model
+from src.features import build_vectorizer
+from src.infer import NumpyModel
+
+PROCESSED = "data/processed/processed"
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = storage.read_table(PROCESSED, columns=["text", "label"]).dropna(
+        subset=["label"]
+    )
+    return df["text"].fillna("").astype(str).tolist(), df["label"].astype(str)
+
+
+def _export(pipe, tmp_path):
+    model_path = str(tmp_path / "model.joblib")
+    joblib.dump(pipe, model_path)
+    return NumpyModel.load(export_model(pipe, model_path))
+
+
+@pytest.mark.parametrize(
+    "vectorizer,clf",
+    [
+        ("tfidf", LogisticRegression(max_iter=1000, random_state=42)),
+        ("tfidf", SGDClassifier(loss="log_loss", random_state=42)),
+        ("hashing", SGDClassifier(loss="log_loss", random_state=42)),
+    ],
+)
+def test_numpy_export_matches_sklearn_proba(tmp_path, data, vectorizer, clf):
+    X, y = data
+    pipe = make_pipeline(build_vectorizer({"vectorizer": vectorizer}), clf).fit(X, y)
+    model = _export(pipe, tmp_path)
+    assert np.allclose(pipe.predict_proba(X), model.predict_proba(X))
+    assert list(model.classes_) == list(pipe.classes_)
+
+
+def test_binary_export_matches_sklearn_proba(tmp_path, data):
+    X, y = data
+    y = (y == y.iloc[0]).astype(str)
+    for clf in (LogisticRegression(max_iter=1000), SGDClassifier(loss="log_loss")):
+        pipe = make_pipeline(build_vectorizer(), clf).fit(X, y)
+        model = _export(pipe, tmp_path)
+        assert np.allclose(pipe.predict_proba(X), model.predict_proba(X))
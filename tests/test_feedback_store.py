@@ -0,0 +1,73 @@
+import os
+
+from src import feedback_store
+from src.feedback_store import FeedbackStore
+
+
+def _store(tmp_path):
+    return FeedbackStore(str(tmp_path / "log"), fsync=False)
+
+
+def test_offsets_are_sequential_and_read_from_returns_the_tail(tmp_path):
+    store = _store(tmp_path)
+    assert store.append("coffee", "dining") == 0
+    assert store.append_many([("fuel", "transport"), ("rent", "housing")]) == 1
+    assert store.end_offset() == 3
+
+    tail = store.read_from(1)
+    assert tail["offset"].tolist() == [1, 2]
+    assert tail["transaction"].tolist() == ["fuel", "rent"]
+    assert tail["label"].tolist() == ["transport", "housing"]
+    # a second handle on the same directory continues the sequence
+    assert _store(tmp_path).append("gym", "health") == 3
+
+
+def test_segments_roll_over_and_old_ones_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback_store, "SEGMENT_BYTES", 64)
+    store = _store(tmp_path)
+    for i in range(6):
+        store.append(f"transaction {i}", "label")
+    segments = store._segments()
+    assert len(segments) > 1
+
+    read = []
+    scan = feedback_store._scan
+    monkeypatch.setattr(
+        feedback_store, "_scan", lambda path: read.append(path) or scan(path)
+    )
+    assert store.read_from(5)["offset"].tolist() == [5]
+    assert read == [segments[-1][1]]
+    assert store.read_from(0)["offset"].tolist() == list(range(6))
+
+
+def test_torn_record_is_truncated_on_next_append(tmp_path):
+    store = _store(tmp_path)
+    store.append_many([("coffee", "dining"), ("fuel", "transport")])
+    path = store._segments()[-1][1]
+    with open(path, "ab") as f:
+        f.write(b"\x02\x00\x00")  # a crash mid-write
+
+    assert store.append("rent", "housing") == 2
+    out = store.read_from(0)
+    assert out["offset"].tolist() == [0, 1, 2]
+    assert out["transaction"].tolist() == ["coffee", "fuel", "rent"]
+
+
+def test_consumer_checkpoints(tmp_path):
+    store = _store(tmp_path)
+    assert store.committed("retrain") == 0
+    store.commit("retrain", 7)
+    assert _store(tmp_path).committed("retrain") == 7
+    assert not [p for p in os.listdir(tmp_path / "log" / "checkpoints") if ".tmp" in p]
+
+
+def test_legacy_csv_is_imported_only_into_an_empty_log(tmp_path):
+    legacy = tmp_path / "feedback.csv"
+    legacy.write_text('coffee,dining\n"rent, monthly",housing\nno label\n')
+    store = _store(tmp_path)
+    assert store.import_csv_if_empty(str(legacy)) == 3
+    assert store.import_csv_if_empty(str(legacy)) == 0
+
+    out = store.read_from(0)
+    assert out["transaction"].tolist() == ["coffee", "rent, monthly", "no label"]
+    assert out["label"].tolist() == ["dining", "housing", ""]
@@ -0,0 +1,75 @@
+import os
+
+import joblib
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from src import model_registry, storage
+from src.export_model import save_model
+from src.features import build_vectorizer
+from src.infer import NumpyModel
+
+
+@pytest.fixture(scope="module")
+def pipe():
+    df = storage.read_table("data/processed/processed", columns=["text", "label"])
+    return make_pipeline(build_vectorizer(), LogisticRegression(max_iter=1000)).fit(
+        df["text"].fillna(""), df["label"]
+    )
+
+
+def _touch_later(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_snapshot_is_reused_until_the_checkpoint_changes(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    joblib.dump({"name": "one"}, path)
+    first = model_registry.get(path, lean=False)
+    assert model_registry.get(path, lean=False) is first
+    assert model_registry.peek(path, lean=False) is first
+
+    joblib.dump({"name": "two"}, path)
+    _touch_later(path)
+    second = model_registry.get(path, lean=False)
+    assert second.model == {"name": "two"}
+    # in-flight callers keep the snapshot they started with
+    assert first.model == {"name": "one"}
+
+
+def test_failed_reload_keeps_serving_and_is_not_retried(tmp_path, monkeypatch):
+    path = str(tmp_path / "model.joblib")
+    joblib.dump({"name": "one"}, path)
+    first = model_registry.get(path, lean=False)
+
+    with open(path, "wb") as f:
+        f.write(b"not a pickle")
+    _touch_later(path)
+    assert model_registry.get(path, lean=False) is first
+
+    calls = []
+    monkeypatch.setattr(model_registry, "_load", lambda *a: calls.append(a))
+    assert model_registry.get(path, lean=False) is first
+    assert calls == []
+
+
+def test_missing_checkpoint(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    assert model_registry.peek(path, lean=False) is None
+    with pytest.raises(FileNotFoundError):
+        model_registry.get(path, lean=False)
+
+
+def test_lean_reload_after_save_serves_export(tmp_path, pipe):
+    path = str(tmp_path / "model.joblib")
+    save_model(pipe, path)
+    first = model_registry.get(path, lean=True)
+    assert isinstance(first.model, NumpyModel)
+
+    save_model(pipe, path)
+    _touch_later(path)
+    second = model_registry.get(path, lean=True)
+    assert second is not first
+    assert isinstance(second.model, NumpyModel)
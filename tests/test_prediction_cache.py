@@ -0,0 +1,63 @@
+import os
+
+from src import prediction_cache
+from src.prediction_cache import PredictionCache, file_fingerprint
+
+VALUE = [("groceries", 0.9), ("dining", 0.1)]
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put_many({("v1", 5, "a"): VALUE, ("v1", 5, "b"): VALUE})
+    cache.get_many([("v1", 5, "a")])  # "b" is now the oldest
+    cache.put_many({("v1", 5, "c"): VALUE})
+
+    found = cache.get_many([("v1", 5, "a"), ("v1", 5, "b"), ("v1", 5, "c")])
+    assert set(found) == {("v1", 5, "a"), ("v1", 5, "c")}
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "time", lambda: now[0])
+    cache = PredictionCache(ttl_seconds=60)
+    cache.put_many({("v1", 5, "a"): VALUE})
+    now[0] += 30
+    assert cache.get_many([("v1", 5, "a")]) == {("v1", 5, "a"): VALUE}
+    now[0] += 61
+    assert cache.get_many([("v1", 5, "a")]) == {}
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    PredictionCache(db_path=db).put_many({("v1", 5, "a"): VALUE})
+
+    cache = PredictionCache(db_path=db)
+    assert cache.get_many([("v1", 5, "a")]) == {("v1", 5, "a"): VALUE}
+    assert cache.get_many([("v1", 5, "a")]) == {("v1", 5, "a"): VALUE}
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["hits"]) == (1, 1)
+
+
+def test_retain_version_drops_other_versions_from_both_tiers(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    cache = PredictionCache(db_path=db)
+    cache.put_many({("v1", 5, "a"): VALUE, ("v2", 5, "a"): VALUE})
+    cache.retain_version("v2")
+
+    assert cache.get_many([("v1", 5, "a")]) == {}
+    fresh = PredictionCache(db_path=db)
+    assert fresh.get_many([("v1", 5, "a"), ("v2", 5, "a")]) == {("v2", 5, "a"): VALUE}
+
+
+def test_file_fingerprint_changes_when_a_file_is_rewritten(tmp_path):
+    path = tmp_path / "model.joblib"
+    missing = file_fingerprint(str(path))
+    path.write_bytes(b"one")
+    first = file_fingerprint(str(path))
+    assert first != missing
+
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert file_fingerprint(str(path)) != first
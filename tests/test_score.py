@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import score
+
+
+def _fake_predict(texts, top_k=3):
+    if "boom" in texts:
+        raise RuntimeError("model failed")
+    return [
+        {"pred": "dining", "conf": 0.9, "alias_override": False, "candidates": []}
+        for _ in texts
+    ]
+
+
+@pytest.mark.parametrize("ext", ["csv", "parquet"])
+def test_failed_scoring_leaves_no_output(tmp_path, monkeypatch, ext):
+    monkeypatch.setattr(score, "predict", _fake_predict)
+    src = tmp_path / "in.csv"
+    pd.DataFrame({"description": ["coffee", "rent", "boom"]}).to_csv(src, index=False)
+    out = str(tmp_path / f"out.{ext}")
+
+    with pytest.raises(RuntimeError):
+        score.score_file(str(src), out, chunksize=2)
+    assert sorted(os.listdir(tmp_path)) == ["in.csv"]
+
+
+def test_scored_rows_keep_input_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr(score, "predict", _fake_predict)
+    src = tmp_path / "in.csv"
+    pd.DataFrame({"description": ["coffee", "rent", "fuel"]}).to_csv(src, index=False)
+    out = str(tmp_path / "out.csv")
+
+    assert score.score_file(str(src), out, top_k=1, chunksize=2) == 3
+    df = pd.read_csv(out)
+    assert df["description"].tolist() == ["coffee", "rent", "fuel"]
+    assert df["pred"].tolist() == ["dining"] * 3
+    assert not os.path.exists(out + ".tmp")
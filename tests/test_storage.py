@@ -0,0 +1,96 @@
+import os
+import warnings
+
+import pandas as pd
+import pytest
+
+from src import storage
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "text": ["null", "nan", "coffee shop", "", "n/a", "fuel stop"],
+            "label": ["a", "b", "a", "b", "a", "c"],
+        }
+    )
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_round_trip_keeps_rows_and_nan_like_strings(tmp_path, frame, fmt):
+    path = str(tmp_path / "data")
+    on_disk = storage.write_table(frame, path, format=fmt)
+    assert on_disk == f"{path}.{fmt}"
+
+    out = storage.read_table(on_disk)
+    assert out["label"].tolist() == frame["label"].tolist()
+    assert out["text"].tolist()[:3] == ["null", "nan", "coffee shop"]
+    assert out["text"].tolist()[4:] == ["n/a", "fuel stop"]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_iter_batches_rebatches_to_exact_size(tmp_path, frame, fmt):
+    on_disk = storage.write_table(frame, str(tmp_path / "data"), format=fmt)
+    batches = list(storage.iter_batches(on_disk, columns=["label"], batch_size=4))
+    assert [len(b) for b in batches] == [4, 2]
+    assert list(batches[0].columns) == ["label"]
+    assert pd.concat(batches)["label"].tolist() == frame["label"].tolist()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_filters_on_a_column_that_is_not_projected(tmp_path, frame, fmt):
+    on_disk = storage.write_table(frame, str(tmp_path / "data"), format=fmt)
+    out = storage.read_table(on_disk, columns=["text"], filters=[("label", "=", "a")])
+    assert out["text"].tolist() == ["null", "coffee shop", "n/a"]
+
+
+def test_partitioned_write_restores_and_prunes_the_key(tmp_path, frame):
+    path = str(tmp_path / "data")
+    on_disk = storage.write_table(frame, path, partition_by=["label"])
+    assert sorted(os.listdir(on_disk)) == ["label=a", "label=b", "label=c"]
+
+    out = storage.read_table(path, filters=[("label", "in", ["b", "c"])])
+    assert sorted(out["label"]) == ["b", "b", "c"]
+    assert "fuel stop" in out["text"].tolist()
+
+
+def test_table_writer_replaces_the_old_dataset(tmp_path, frame):
+    path = str(tmp_path / "data")
+    storage.write_table(frame, path)
+    with storage.TableWriter(path, rows_per_file=2) as w:
+        w.write(frame.iloc[:3])
+    assert len(os.listdir(f"{path}.parquet")) == 2
+    assert len(storage.read_table(path)) == 3
+    assert not [p for p in os.listdir(tmp_path) if ".tmp-" in p or ".old-" in p]
+
+
+def test_failed_write_keeps_the_old_dataset(tmp_path, frame):
+    path = str(tmp_path / "data")
+    storage.write_table(frame, path)
+    with pytest.raises(RuntimeError):
+        with storage.TableWriter(path) as w:
+            w.write(frame.iloc[:1])
+            raise RuntimeError("boom")
+    assert len(storage.read_table(path)) == len(frame)
+    assert os.listdir(tmp_path) == ["data.parquet"]
+
+
+def test_both_formats_warn_once_from_the_caller(tmp_path, frame, monkeypatch):
+    monkeypatch.setattr(storage, "_warned", set())
+    path = str(tmp_path / "data")
+    storage.write_table(frame, path, format="parquet")
+    storage.write_table(frame.iloc[:2], path, format="csv")
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        out = storage.read_table(path)
+        storage.read_table(path)
+    assert len(out) == len(frame)
+    assert len(caught) == 1
+    assert caught[0].filename == __file__
+
+
+def test_missing_dataset_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        storage.read_table(str(tmp_path / "nothing"))
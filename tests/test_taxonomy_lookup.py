@@ -0,0 +1,22 @@
+import os
+
+from src.taxonomy_lookup import get_alias_matcher, load_taxonomy
+
+
+def _write(path, alias):
+    path.write_text(f"categories:\n  - id: dining\n    aliases: [{alias}]\n")
+
+
+def test_edited_taxonomy_is_picked_up(tmp_path):
+    path = tmp_path / "taxonomy.yaml"
+    _write(path, "starbucks")
+    assert get_alias_matcher(str(path)).lookup("STARBUCKS 123")[0] == "dining"
+    assert get_alias_matcher(str(path)) is get_alias_matcher(str(path))
+
+    _write(path, "costa")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert load_taxonomy(str(path))[0]["aliases_norm"] == ["costa"]
+    matcher = get_alias_matcher(str(path))
+    assert matcher.lookup("STARBUCKS 123") == (None, None, None)
+    assert matcher.lookup("costa coffee") == ("dining", "token", "costa")
@@ -0,0 +1,19 @@
+import numpy as np
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score
+
+from src.train import _scores
+
+
+def test_scores_average_macro_f1_over_labels_present():
+    rng = np.random.default_rng(0)
+    # classes 4 and 5 are known to the model but missing from the held-out rows
+    y_true = rng.integers(0, 4, 500)
+    y_pred = rng.integers(0, 6, 500)
+    cm = confusion_matrix(y_true, y_pred, labels=range(6))
+
+    accuracy, macro_f1 = _scores(cm)
+    assert np.isclose(accuracy, accuracy_score(y_true, y_pred))
+    assert np.isclose(
+        macro_f1,
+        f1_score(y_true, y_pred, labels=np.unique(y_true), average="macro"),
+    )